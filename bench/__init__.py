@@ -0,0 +1 @@
+"""Benchmarks of the check pipeline against a local mock RPC farm."""
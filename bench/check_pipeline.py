@@ -0,0 +1,202 @@
+"""Drive synthetic nodes through the real check path (CheckScheduler -> NodeService.check -> rpc -> CheckWriter).
+
+Run: uv run python -m bench.check_pipeline --nodes 2000 --duration 30
+Exits with code 1 if the check path logged errors, e.g. failed node updates, or if --min-throughput is given and not
+reached, so it can gate regressions.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any
+
+from bson import ObjectId
+from mm_web3 import Network
+
+from app.core.db import Node
+from app.core.services import NodeService, ProxyService
+from bench.memory_db import MemoryDb
+from bench.mock_farm import FakeProxy, FarmConfig, MockFarm
+
+NETWORKS = {"evm": Network.ETHEREUM, "solana": Network.SOLANA, "aptos": Network.APTOS, "starknet": Network.STARKNET}
+
+
+class ErrorCounter(logging.Handler):
+    """Counts error records of the app loggers: check_writer only logs failed writes, so they must fail the run."""
+
+    def __init__(self) -> None:
+        """Create a handler for ERROR and above with a zero count."""
+        super().__init__(logging.ERROR)
+        self.count = 0
+        self.messages: Counter[str] = Counter()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Count the record."""
+        self.count += 1
+        self.messages[f"{record.name}: {record.getMessage()}"] += 1
+
+
+def make_service(cls: type[NodeService | ProxyService], core: object) -> Any:  # noqa: ANN401
+    """Create a service bound to the stand-in core without going through mm_base6 Core.init."""
+    service = cls.__new__(cls)
+    service.core = core  # type: ignore[assignment]
+    return service
+
+
+def make_core(
+    db: MemoryDb,
+    proxies: list[str],
+    concurrency: int,
+    batch_size: int,
+    *,
+    preprobe: bool,
+    adaptive_max: int,
+    host_rate_limits: str,
+) -> Any:  # noqa: ANN401
+    """Stand-in for AppCore with just what the check path reads."""
+    settings = SimpleNamespace(
+        auto_check=True,
+        limit_concurrent_checks=concurrency,
+        check_batch_size=batch_size,
+        check_interval=1,  # keep every node due, so the run measures max throughput
+        check_interval_min=1,
+        check_interval_max=1,
+        proxy_affinity=True,
+        check_workers=0,
+        check_response_sample=0.01,
+        check_preprobe=preprobe,
+        check_result_max_age=10,
+        check_lease_time=60,
+        proxy_canary_url="",
+        host_rate_limits=host_rate_limits,
+        adaptive_concurrency=adaptive_max > 0,
+        concurrency_floor=1,
+        concurrency_ceiling=adaptive_max,
+        http_connections_per_host=0,
+    )
+    core = SimpleNamespace(db=db, settings=settings, state=SimpleNamespace(proxies=proxies), services=SimpleNamespace())
+    core.services.node = make_service(NodeService, core)
+    core.services.proxy = make_service(ProxyService, core)
+    return core
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile, 0 for an empty list."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))]
+
+
+async def flush_loop(core: Any) -> None:  # noqa: ANN401
+    """Flush buffered check results every second, as the mm_base6 scheduler does in production."""
+    while True:
+        await asyncio.sleep(1)
+        await core.services.node.check_writer.flush()
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run the benchmark, print a report, return the process exit code."""
+    farm = MockFarm(
+        FarmConfig(
+            latency_median=args.latency,
+            error_rate=args.error_rate,
+            garbage_rate=args.garbage_rate,
+            timeout_rate=args.timeout_rate,
+            ports=args.ports,
+        )
+    )
+    await farm.start()
+    proxy = FakeProxy(latency=args.proxy_latency)
+    await proxy.start()
+
+    db = MemoryDb()
+    for kind, network in NETWORKS.items():
+        for url in farm.urls(kind, args.nodes // len(NETWORKS)):
+            db.node.add(Node(id=ObjectId(), network=network, url=url))
+    core = make_core(
+        db,
+        [proxy.url] if args.proxy else [],
+        args.concurrency,
+        args.batch_size,
+        preprobe=args.preprobe,
+        adaptive_max=args.adaptive_max,
+        host_rate_limits=args.host_rate_limits,
+    )
+
+    errors = ErrorCounter()
+    logging.getLogger("app").addHandler(errors)
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(core.services.node.check_scheduler.run()), asyncio.create_task(flush_loop(core))]
+    await asyncio.sleep(args.duration)
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await core.services.node.check_writer.flush()
+    duration = time.perf_counter() - started
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pool_stats = core.services.node.http_pool.stats
+    await core.services.node.http_pool.close()
+    await proxy.stop()
+    await farm.stop()
+
+    checks = len(db.check.elapsed)
+    throughput = checks / duration
+    print(f"nodes: {len(db.node.docs)}, concurrency: {args.concurrency}, batch size: {args.batch_size}, proxy: {args.proxy}")
+    print(f"checks: {checks} in {duration:.1f}s, throughput: {throughput:.1f} checks/s")
+    print(f"statuses: {dict(db.check.statuses)}")
+    elapsed = db.check.elapsed
+    p50, p95, p99 = (percentile(elapsed, p) for p in (50, 95, 99))
+    print(f"elapsed: p50 {p50:.3f}s, p95 {p95:.3f}s, p99 {p99:.3f}s")
+    print(f"mongo ops: {dict(sorted(db.ops.items()))}, per check: {sum(db.ops.values()) / max(1, checks):.2f}")
+    print(f"http pool: {pool_stats.model_dump()}")
+    if args.adaptive_max:
+        concurrency = core.services.node.concurrency.stats()
+        print(f"adaptive limit: {concurrency.limit}, adjustments: {[a.reason for a in concurrency.adjustments[:5]]}")
+    print(f"farm requests: {farm.requests}, proxy connections: {proxy.connections}")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"memory: traced peak {peak_memory / 2**20:.1f} MiB, max rss {max_rss:.1f} MiB")
+
+    logging.getLogger("app").removeHandler(errors)
+    if errors.count:
+        print(f"FAIL: {errors.count} errors logged: {dict(errors.messages.most_common(5))}")
+        return 1
+    if args.min_throughput and throughput < args.min_throughput:
+        print(f"FAIL: throughput {throughput:.1f} < {args.min_throughput}")
+        return 1
+    return 0
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=50, help="limit_concurrent_checks")
+    parser.add_argument("--adaptive-max", type=int, default=0, help="adaptive_concurrency up to this ceiling, 0 = fixed limit")
+    parser.add_argument("--batch-size", type=int, default=1, help="check_batch_size")
+    parser.add_argument("--ports", type=int, default=8, help="count of mock provider hosts")
+    parser.add_argument("--latency", type=float, default=0.05, help="median endpoint latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--garbage-rate", type=float, default=0.02)
+    parser.add_argument("--timeout-rate", type=float, default=0.02)
+    parser.add_argument("--proxy", action="store_true", help="send checks through the fake proxy")
+    parser.add_argument("--preprobe", action="store_true", help="check_preprobe: DNS and TCP pre-probe before each RPC")
+    parser.add_argument("--host-rate-limits", default="", help="host_rate_limits, e.g. '* 50'")
+    parser.add_argument("--proxy-latency", type=float, default=0.01, help="seconds per proxy connection")
+    parser.add_argument("--min-throughput", type=float, default=0, help="fail below this many checks/s")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""In-memory stand-in for the Mongo collections used by the check path, counting every operation."""
+
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Iterable
+from typing import Any
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.db import Check, Node
+
+# aggregation operators of the Node.check_update pipeline, applied to their evaluated arguments
+_OPERATORS: dict[str, Callable[[Any], Any]] = {
+    "$ifNull": lambda args: args[0] if args[0] is not None else args[1],
+    "$substrBytes": lambda args: args[0][args[1] : args[1] + args[2]],
+    "$concat": "".join,
+    "$add": sum,
+    "$subtract": lambda args: args[0] - args[1],
+    "$cond": lambda args: args[1] if args[0] else args[2],
+    "$eq": lambda args: args[0] == args[1],
+    "$slice": lambda args: args[0][: args[1]],
+    "$size": len,
+}
+
+
+def _matches(doc: dict[str, Any], query: dict[str, Any]) -> bool:
+    """Equality and $gt/$gte/$lt/$lte/$in/$exists on top-level fields, enough for the queries of the check path."""
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+            for op, arg in cond.items():
+                if op == "$exists" and (key in doc) != arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte") and value is None:
+                    return False
+                if (
+                    (op == "$gt" and not value > arg)
+                    or (op == "$gte" and not value >= arg)
+                    or (op == "$lt" and not value < arg)
+                    or (op == "$lte" and not value <= arg)
+                ):
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _evaluate(expr: Any, doc: dict[str, Any], variables: dict[str, Any]) -> Any:  # noqa: ANN401
+    """Evaluate an aggregation expression against a document; only the operators Node.check_update uses."""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        return variables[expr[2:]]
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [_evaluate(item, doc, variables) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    ((op, arg),) = expr.items()
+    if op == "$literal":
+        return arg
+    if op == "$reduce":
+        value = _evaluate(arg["initialValue"], doc, variables)
+        for item in _evaluate(arg["input"], doc, variables):
+            value = _evaluate(arg["in"], doc, variables | {"value": value, "this": item})
+        return value
+    if op == "$filter":
+        items = _evaluate(arg["input"], doc, variables)
+        return [item for item in items if _evaluate(arg["cond"], doc, variables | {"this": item})]
+    if op not in _OPERATORS:
+        raise ValueError(f"unsupported aggregation operator {op}")
+    return _OPERATORS[op](_evaluate(arg, doc, variables))
+
+
+class MemoryRawCollection:
+    """The subset of pymongo AsyncCollection used via `collection.collection`."""
+
+    def __init__(self, name: str, docs: dict[ObjectId, dict[str, Any]], ops: Counter[str]) -> None:
+        """Wrap docs, shared with the owning collection; ops counts the calls."""
+        self.name = name
+        self.docs = docs
+        self.ops = ops
+
+    def _count(self, op: str) -> None:
+        self.ops[f"{self.name}.{op}"] += 1
+
+    async def find(self, query: dict[str, Any], projection: dict[str, int] | None = None) -> AsyncIterator[dict[str, Any]]:
+        """Iterate matching documents, projected."""
+        self._count("find")
+        for doc in list(self.docs.values()):
+            if _matches(doc, query):
+                yield {"_id": doc["_id"]} | {k: doc[k] for k in projection or doc if k in doc}
+
+    async def bulk_write(self, requests: Iterable[UpdateOne], ordered: bool = True) -> None:  # noqa: ARG002
+        """Apply UpdateOne operations: `$set` documents and the Node.check_update pipeline."""
+        self._count("bulk_write")
+        for request in requests:
+            doc = self.docs.get(request._filter["_id"])  # noqa: SLF001
+            if doc is not None:
+                self._apply(doc, request._doc)  # noqa: SLF001
+
+    @staticmethod
+    def _apply(doc: dict[str, Any], update: dict[str, Any] | list[dict[str, Any]]) -> None:
+        """Apply a `$set` update document or an update pipeline of `$set` and `$unset` stages."""
+        if isinstance(update, dict):
+            doc.update(update.get("$set", {}))
+            return
+        for stage in update:
+            if "$set" in stage:
+                doc.update({key: _evaluate(expr, doc, {}) for key, expr in stage["$set"].items()})
+            else:
+                unset = stage["$unset"]
+                for key in [unset] if isinstance(unset, str) else unset:
+                    doc.pop(key, None)
+
+
+class MemoryNodeCollection:
+    """The subset of mm_mongo AsyncMongoCollection[ObjectId, Node] used by the check path."""
+
+    def __init__(self, ops: Counter[str]) -> None:
+        """Create an empty collection counting its calls in ops."""
+        self.docs: dict[ObjectId, dict[str, Any]] = {}
+        self.collection = MemoryRawCollection("node", self.docs, ops)
+
+    async def get(self, id: ObjectId) -> Node:
+        """Get a node by id, raises KeyError if missing."""
+        self.collection.ops["node.get"] += 1
+        return Node.model_validate(self.docs[id])
+
+    async def exists(self, query: dict[str, Any]) -> bool:
+        """Tell whether any node matches."""
+        self.collection.ops["node.exists"] += 1
+        return any(_matches(doc, query) for doc in self.docs.values())
+
+    def add(self, node: Node) -> None:
+        """Seed a node without counting an operation."""
+        self.docs[node.id] = node.model_dump(by_alias=True)
+
+
+class MemoryCheckCollection:
+    """Keeps only status and elapsed of inserted checks, so a long run does not measure the stand-in's memory."""
+
+    def __init__(self, ops: Counter[str]) -> None:
+        """Create an empty collection counting its calls in ops."""
+        self.ops = ops
+        self.elapsed: list[float] = []
+        self.statuses: Counter[str] = Counter()
+
+    async def insert_many(self, checks: list[Check], ordered: bool = True) -> None:  # noqa: ARG002
+        """Record inserted checks."""
+        self.ops["check.insert_many"] += 1
+        for check in checks:
+            self.elapsed.append(check.elapsed)
+            self.statuses[check.status.value] += 1
+
+
+class MemoryRollupCollection:
+    """Counts rollup upserts; the buckets themselves are not kept."""
+
+    def __init__(self, ops: Counter[str]) -> None:
+        """Create a collection counting its calls in ops."""
+        self.collection = self
+        self.ops = ops
+        self.upserts = 0
+
+    async def bulk_write(self, requests: list[UpdateOne], ordered: bool = True) -> None:  # noqa: ARG002
+        """Record upserted buckets."""
+        self.ops["check_rollup.bulk_write"] += 1
+        self.upserts += len(requests)
+
+
+class MemoryDb:
+    """node, check and check_rollup collections plus a shared op counter."""
+
+    def __init__(self) -> None:
+        """Create empty collections."""
+        self.ops: Counter[str] = Counter()
+        self.node = MemoryNodeCollection(self.ops)
+        self.check = MemoryCheckCollection(self.ops)
+        self.check_rollup = MemoryRollupCollection(self.ops)
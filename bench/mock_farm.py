@@ -0,0 +1,147 @@
+"""Local mock RPC farm: EVM, Solana, Aptos and Starknet height endpoints plus a fake HTTP proxy."""
+
+import asyncio
+import contextlib
+import random
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+
+@dataclass
+class FarmConfig:
+    """Behaviour of the mock endpoints. Rates are probabilities per request."""
+
+    latency_median: float = 0.05  # seconds, latency is log-normal around the median
+    latency_sigma: float = 0.5
+    error_rate: float = 0.05  # HTTP 500
+    garbage_rate: float = 0.02  # HTTP 200 with an HTML body
+    timeout_rate: float = 0.02  # never answers within the client timeout
+    timeout_delay: float = 30
+    ports: int = 8  # each port is a separate provider host for the connection pool
+    heights: dict[str, int] = field(
+        default_factory=lambda: {"evm": 21_000_000, "starknet": 1_000_000, "solana": 300_000_000, "aptos": 9_000_000}
+    )
+
+
+class MockFarm:
+    """aiohttp app serving /evm/{i}, /starknet/{i}, /solana/{i} (JSON-RPC POST) and /aptos/{i} (GET) on several ports."""
+
+    def __init__(self, config: FarmConfig) -> None:
+        """Create a stopped farm, start picks the ports."""
+        self.config = config
+        self.requests = 0
+        self.ports: list[int] = []
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        """Start listening on config.ports random free ports."""
+        app = web.Application()
+        app.router.add_post("/evm/{i}", self._evm)
+        app.router.add_post("/starknet/{i}", self._starknet)
+        app.router.add_post("/solana/{i}", self._solana)
+        app.router.add_get("/aptos/{i}", self._aptos)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        for _ in range(self.config.ports):
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.ports.append(site._server.sockets[0].getsockname()[1])  # type: ignore[union-attr] # noqa: SLF001
+
+    async def stop(self) -> None:
+        """Stop all listeners."""
+        if self._runner:
+            await self._runner.cleanup()
+
+    def urls(self, network_type: str, count: int) -> list[str]:
+        """Node URLs of a network type spread evenly across ports."""
+        return [f"http://127.0.0.1:{self.ports[i % len(self.ports)]}/{network_type}/{i}" for i in range(count)]
+
+    async def _misbehave(self) -> web.Response | None:
+        self.requests += 1
+        config = self.config
+        await asyncio.sleep(random.lognormvariate(0, config.latency_sigma) * config.latency_median)
+        roll = random.random()
+        if roll < config.timeout_rate:
+            await asyncio.sleep(config.timeout_delay)
+        elif roll < config.timeout_rate + config.error_rate:
+            return web.Response(status=500, text="internal error")
+        elif roll < config.timeout_rate + config.error_rate + config.garbage_rate:
+            return web.Response(text="<html><body>bad gateway</body></html>", content_type="text/html")
+        return None
+
+    def _height(self, kind: str) -> int:
+        self.config.heights[kind] += random.choice((0, 0, 1))
+        return self.config.heights[kind] - random.choice((0, 0, 0, 1, 50))
+
+    async def _evm(self, _request: web.Request) -> web.Response:
+        if res := await self._misbehave():
+            return res
+        return web.json_response({"jsonrpc": "2.0", "id": "1", "result": hex(self._height("evm"))})
+
+    async def _starknet(self, _request: web.Request) -> web.Response:
+        if res := await self._misbehave():
+            return res
+        return web.json_response({"jsonrpc": "2.0", "id": "1", "result": self._height("starknet")})
+
+    async def _solana(self, _request: web.Request) -> web.Response:
+        if res := await self._misbehave():
+            return res
+        return web.json_response({"jsonrpc": "2.0", "id": "1", "result": self._height("solana")})
+
+    async def _aptos(self, _request: web.Request) -> web.Response:
+        if res := await self._misbehave():
+            return res
+        return web.json_response({"chain_id": 1, "block_height": str(self._height("aptos"))})
+
+
+class FakeProxy:
+    """Plain HTTP proxy for http:// targets: relays the absolute-form request bytes to the target farm port.
+
+    aiohttp sends `POST http://host:port/path` to an HTTP proxy for plain http targets, and the farm routes such
+    requests by path, so relaying bytes to the target port is enough. `latency` is added once per connection.
+    """
+
+    def __init__(self, latency: float = 0.01) -> None:
+        """Create a stopped proxy, start picks the port."""
+        self.latency = latency
+        self.connections = 0
+        self.port = 0
+        self._server: asyncio.Server | None = None
+
+    @property
+    def url(self) -> str:
+        """Proxy URL for the proxy list."""
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening on a random free port."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._server:
+            self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.latency)
+        try:
+            head = await reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError:  # the client closed the connection before its first request
+            writer.close()
+            return
+        target = head.split(b" ")[1].decode()  # http://127.0.0.1:port/path
+        port = int(target.split("/")[2].rsplit(":", 1)[1])
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", port)
+        upstream_writer.write(head)
+        await asyncio.gather(self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer))
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        with contextlib.suppress(ConnectionError):
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        writer.close()
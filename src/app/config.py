@@ -6,7 +6,7 @@ from typing import Annotated
 from mm_base6 import BaseSettings, BaseState, Config, setting_field, state_field
 
 config = Config(  # ty: ignore[missing-argument]  # pydantic-settings loads from env vars
-    openapi_tags=["node", "check", "proxy"], ui_menu={"/nodes": "nodes", "/networks": "networks", "/checks": "checks"}
+    openapi_tags=["node", "check", "proxy", "system"], ui_menu={"/nodes": "nodes", "/networks": "networks", "/checks": "checks"}
 )
 
 
@@ -14,12 +14,44 @@ class Settings(BaseSettings):
     """User-configurable application settings."""
 
     proxies_url: Annotated[str, setting_field("http://localhost:8000", "proxies url, each proxy on new line")]
+    proxy_canary_url: Annotated[
+        str, setting_field("", "URL new proxies must reach before admission, empty = the best live node, none live = admit")
+    ]
+    proxy_affinity: Annotated[bool, setting_field(True, "keep the same proxy for a node while the proxy stays healthy")]
     limit_concurrent_checks: Annotated[int, setting_field(10, "limit concurrent checks")]
+    adaptive_concurrency: Annotated[
+        bool, setting_field(False, "tune the check limit between floor and ceiling, limit_concurrent_checks is the start value")
+    ]
+    concurrency_floor: Annotated[int, setting_field(5, "min concurrent checks with adaptive_concurrency")]
+    concurrency_ceiling: Annotated[int, setting_field(200, "max concurrent checks with adaptive_concurrency")]
+    http_connections_per_host: Annotated[
+        int, setting_field(0, "pooled connections per provider host and proxy, 0 = one per concurrent check; restart to apply")
+    ]
     auto_check: Annotated[bool, setting_field(True, "auto check nodes")]
+    check_interval: Annotated[int, setting_field(60, "seconds between checks of a healthy node")]
+    check_interval_min: Annotated[int, setting_field(30, "seconds between checks of a healthy node near the network tip")]
+    check_interval_max: Annotated[int, setting_field(3600, "max seconds between checks, caps backoff of failing nodes")]
+    check_batch_size: Annotated[
+        int, setting_field(1, "due nodes of one host and network type taken at once via one proxy, 1 = off; workers ignore it")
+    ]
+    host_rate_limits: Annotated[
+        str, setting_field("", "checks per second per provider host: `host rate [burst]`, comma-separated, * = any host")
+    ]
+    check_preprobe: Annotated[
+        bool, setting_field(False, "resolve the host and open a TCP connection before an RPC request that goes without a proxy")
+    ]
+    check_workers: Annotated[
+        int, setting_field(0, "check worker processes next to the web server, 0 = check in the web process; restart to apply")
+    ]
+    check_response_sample: Annotated[float, setting_field(0.01, "share of ok checks stored with their raw response, 0..1")]
+    check_result_max_age: Annotated[
+        int, setting_field(10, "seconds a check result is served to on-demand checks of the node, 0 = always check")
+    ]
+    check_lease_time: Annotated[int, setting_field(60, "seconds a check worker owns a claimed node, then it is claimed again")]
 
 
 class State(BaseState):
     """Runtime application state."""
 
-    proxies: Annotated[list[str], state_field([])]
+    proxies: Annotated[list[str], state_field([], "admitted proxies, the pool starts from them after a restart")]
     proxies_updated_at: Annotated[datetime | None, state_field(None, "timestamp of last proxies update")]
@@ -0,0 +1,90 @@
+"""Single-flight node checks with a short-lived cache of their results."""
+
+import asyncio
+import enum
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from bson import ObjectId
+from mm_result import Result
+
+
+@enum.unique
+class CheckSource(enum.StrEnum):
+    """Where the result of an on-demand check came from."""
+
+    FRESH = "fresh"  # a new probe was started for the caller
+    SHARED = "shared"  # joined a probe of the node that was already running
+    CACHED = "cached"  # a result of a recent probe
+
+
+@dataclass(frozen=True, slots=True)
+class CheckOutcome:
+    """Result of an on-demand check and how it was obtained."""
+
+    result: Result[int]
+    source: CheckSource
+    age: float  # seconds since the probe finished, 0 for fresh and shared
+
+
+class CheckFlights:
+    """At most one running check per node: callers for a node that is being checked wait for that check.
+
+    Finished results are kept for the `keep` seconds given to run. Entries are kept in finish order, so expired ones
+    are evicted from the front as new results come in. A caller that is cancelled does not cancel the shared check.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._running: dict[ObjectId, asyncio.Task[Result[int]]] = {}
+        self._recent: OrderedDict[ObjectId, tuple[float, Result[int]]] = OrderedDict()  # id -> (monotonic time, result)
+
+    def __len__(self) -> int:
+        """Count of running checks."""
+        return len(self._running)
+
+    async def run(self, id: ObjectId, check: Callable[[], Awaitable[Result[int]]], keep: float) -> CheckOutcome:
+        """Join the running check of the node, or start check() as the node's running check and keep its result."""
+        task = self._running.get(id)
+        source = CheckSource.SHARED
+        if task is None:
+            task = asyncio.ensure_future(check())
+            self._running[id] = task
+            task.add_done_callback(lambda t: self._done(id, t, keep))
+            source = CheckSource.FRESH
+        return CheckOutcome(result=await asyncio.shield(task), source=source, age=0.0)
+
+    def recent(self, id: ObjectId, max_age: float) -> CheckOutcome | None:
+        """Return the result of a check of the node that finished at most max_age seconds ago, else None."""
+        entry = self._recent.get(id)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        return CheckOutcome(result=entry[1], source=CheckSource.CACHED, age=age) if age <= max_age else None
+
+    def forget(self, id: ObjectId) -> None:
+        """Drop the cached result of a node."""
+        self._recent.pop(id, None)
+
+    async def cancel(self) -> None:
+        """Cancel running checks and wait for them to finish."""
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _done(self, id: ObjectId, task: asyncio.Task[Result[int]], keep: float) -> None:
+        if self._running.get(id) is task:
+            del self._running[id]
+        if task.cancelled() or task.exception() is not None or keep <= 0:
+            return
+        now = time.monotonic()
+        self._recent.pop(id, None)
+        self._recent[id] = (now, task.result())
+        while self._recent:
+            finished_at, _ = next(iter(self._recent.values()))
+            if now - finished_at <= keep:
+                break
+            self._recent.popitem(last=False)
@@ -0,0 +1,120 @@
+"""Lease-based check loop for worker processes: due nodes are claimed in Mongo, so any number of workers can share them."""
+
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta
+
+import anyio
+from mm_std import utc
+from pymongo import ReturnDocument
+
+from app.core.db import Node
+from app.core.metrics import MONGO_OP_SECONDS
+from app.core.rate_limit import url_host
+from app.core.types import AppCore
+
+logger = logging.getLogger(__name__)
+
+IDLE_SLEEP = 1  # seconds to wait when no node is due
+DEFER_JITTER = 1  # max seconds added to a rate limit deferral, so deferred nodes of one host do not return together
+
+
+def claim_filter(now: datetime) -> dict[str, object]:
+    """Nodes that are due and not leased at now, a missing next_check_at or lease_until counts as past."""
+    return {"next_check_at": {"$not": {"$gt": now}}, "lease_until": {"$not": {"$gt": now}}}
+
+
+def worker_id() -> str:
+    """Lease owner name of this process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseChecker:
+    """Claims due nodes one at a time with an expiring lease and checks them in AdaptiveConcurrency limit slots.
+
+    A claim is a single find_one_and_update, so two workers never get the same node, and it returns the node
+    itself, so the check needs no extra read. The check update clears the lease. A crashed worker's leases expire
+    after `check_lease_time` seconds and the nodes become claimable again.
+
+    A claimed node whose host is out of rate limit tokens is not checked: it is released with a later next_check_at.
+    """
+
+    def __init__(self, core: AppCore, owner: str) -> None:
+        """Create a checker, owner is stored in lease_owner of the nodes it claims."""
+        self.core = core
+        self.owner = owner
+        self._backlogged = False  # the last claim found a due node
+
+    async def claim(self) -> Node | None:
+        """Lease the most overdue unleased node, None if nothing is due."""
+        now = utc()
+        lease_until = now + timedelta(seconds=self.core.settings.check_lease_time)
+        with MONGO_OP_SECONDS.time("node", "claim"):
+            doc = await self.core.db.node.collection.find_one_and_update(
+                claim_filter(now),
+                {"$set": {"lease_owner": self.owner, "lease_until": lease_until}},
+                sort=[("next_check_at", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+        return Node.model_validate(doc) if doc else None
+
+    async def release(self) -> int:
+        """Drop all leases of this worker, returns count of released nodes."""
+        res = await self.core.db.node.collection.update_many(
+            {"lease_owner": self.owner}, {"$set": {"lease_owner": None, "lease_until": None}}
+        )
+        return res.modified_count
+
+    async def defer(self, node: Node, delay: float) -> None:
+        """Release a claimed node and make it due again after delay seconds."""
+        next_check_at = utc(seconds=delay + random.uniform(0, DEFER_JITTER))
+        with MONGO_OP_SECONDS.time("node", "defer"):
+            await self.core.db.node.collection.update_one(
+                {"_id": node.id}, {"$set": {"next_check_at": next_check_at, "lease_owner": None, "lease_until": None}}
+            )
+
+    async def run(self) -> None:
+        """Claim and check due nodes until cancelled."""
+        concurrency = self.core.services.node.concurrency
+        limiter = anyio.CapacityLimiter(concurrency.limit)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(concurrency.run, lambda: (limiter.borrowed_tokens, int(self._backlogged)), name="adaptive_concurrency")
+            while True:
+                if not self.core.settings.auto_check:
+                    await anyio.sleep(IDLE_SLEEP)
+                    continue
+                limiter.total_tokens = concurrency.limit
+                slot = object()
+                await limiter.acquire_on_behalf_of(slot)
+                try:
+                    node = await self.claim()
+                except Exception:
+                    logger.exception("claim failed")
+                    node = None
+                self._backlogged = node is not None
+                if node is None:
+                    limiter.release_on_behalf_of(slot)
+                    await anyio.sleep(IDLE_SLEEP)
+                    continue
+                wait = self.core.services.node.rate_limits.acquire(url_host(node.url))
+                if wait > 0:
+                    limiter.release_on_behalf_of(slot)
+                    await self._defer(node, wait)
+                    continue
+                tg.start_soon(self._check, node, slot, limiter, name=f"check_node_{node.id}")
+
+    async def _defer(self, node: Node, delay: float) -> None:
+        try:
+            await self.defer(node, delay)
+        except Exception:
+            logger.exception("defer failed", extra={"node_id": str(node.id)})
+
+    async def _check(self, node: Node, slot: object, limiter: anyio.CapacityLimiter) -> None:
+        try:
+            await self.core.services.node.check_node(node)
+        except Exception:
+            logger.exception("check failed", extra={"node_id": str(node.id)})
+        finally:
+            limiter.release_on_behalf_of(slot)
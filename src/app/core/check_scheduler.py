@@ -0,0 +1,303 @@
+"""Continuous check scheduler: a min-heap of nodes keyed by next-due time served by a fixed pool of check slots."""
+
+import heapq
+import logging
+import random
+import time
+import zlib
+from collections import deque
+from datetime import UTC, datetime
+from urllib.parse import urlsplit
+
+import anyio
+from bson import ObjectId
+from mm_web3 import Network
+
+from app.core.metrics import MONGO_OP_SECONDS, SCHEDULER_LAG_SECONDS
+from app.core.rate_limit import url_host
+from app.core.types import AppCore
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL = 5  # seconds between incremental loads of new nodes
+FULL_SYNC_INTERVAL = 60  # seconds between full resyncs, they drop deleted nodes
+IDLE_SLEEP = 1  # max seconds to sleep when nothing is due
+NEAR_TIP_LAG = 2  # blocks, a healthy node this close to the network tip is checked at the min interval
+MAX_BACKOFF_STEPS = 16
+CHECK_JITTER = 0.1  # share of the interval added or taken at random, so nodes checked together drift apart
+
+
+def timestamp(dt: datetime) -> float:
+    """Convert a datetime from Mongo to a unix timestamp, naive values are treated as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.timestamp()
+
+
+def next_check_interval(failures: int, lag: int | None, interval: int, interval_min: int, interval_max: int) -> int:
+    """Seconds until the next check of a node.
+
+    Healthy nodes near the tip are checked every interval_min, other healthy nodes every interval. Consecutive
+    failures double the interval each time, so nodes that stay down cost less and less. The result is clamped
+    to [interval_min, interval_max].
+    """
+    if failures > 0:
+        result = interval * 2 ** (min(failures, MAX_BACKOFF_STEPS) - 1)
+    elif lag is not None and lag <= NEAR_TIP_LAG:
+        result = interval_min
+    else:
+        result = interval
+    return max(interval_min, min(interval_max, result))
+
+
+def jittered(interval: float, interval_max: int) -> float:
+    """Interval with random CHECK_JITTER applied, capped at interval_max."""
+    return min(interval_max, interval * random.uniform(1 - CHECK_JITTER, 1 + CHECK_JITTER))
+
+
+def spread_offset(id: ObjectId) -> float:
+    """Stable per-node fraction in [0, 1) used to spread overdue nodes over an interval."""
+    return zlib.crc32(id.binary) / 2**32
+
+
+def batch_key(url: str, network: Network) -> str:
+    """Key of nodes that can be checked together: same host and network type."""
+    return f"{network.network_type}|{urlsplit(url).netloc}"
+
+
+def batch_key_host(key: str) -> str | None:
+    """Host of a batch key, the rate limit key."""
+    _, sep, netloc = key.partition("|")
+    return url_host(f"//{netloc}") if sep else None
+
+
+class CheckScheduler:
+    """Keeps every node in a min-heap by next-due time and checks due nodes as soon as a slot is free.
+
+    The number of slots is the limit of AdaptiveConcurrency, which runs next to the loop. A slow node holds only
+    its own slot, other slots keep picking up due nodes. Heap entries are invalidated lazily: an entry is live only
+    while its due time matches `_due`. A node is waiting in `_due`, due and queued in `_ready`, or checking in
+    `_running`; the check itself schedules the next due time.
+
+    With `check_workers` > 0 at start the scheduler stays idle, worker processes claim due nodes via LeaseChecker instead.
+
+    Due nodes are queued per batch key (host and network type) and keys are served round-robin, so one provider
+    host never takes all slots at once. With `check_batch_size` > 1 up to that many queued nodes of one key are
+    taken at once, each still checked in its own slot, through the proxy pinned to the key: they reuse the keep-alive
+    connections of one pooled session. LeaseChecker ignores the setting.
+
+    A key whose host is out of rate limit tokens (see HostRateLimiter) is not served: its queued nodes go back to
+    the heap, staggered at the host's rate. Nodes overdue at start or when `auto_check` is turned back on are
+    spread over one `check_interval`, so they do not hit the providers in one wave.
+    """
+
+    def __init__(self, core: AppCore) -> None:
+        """Create an empty scheduler, nodes are loaded by sync."""
+        self.core = core
+        self._heap: list[tuple[float, ObjectId]] = []
+        self._due: dict[ObjectId, float] = {}  # node id -> current due time
+        self._ready: dict[str, deque[ObjectId]] = {}  # batch key -> due nodes, in round-robin order
+        self._queued: dict[ObjectId, float] = {}  # nodes in _ready -> due time, for the lag metric
+        self._keys: dict[ObjectId, str] = {}  # node id -> batch key
+        self._running: set[ObjectId] = set()
+        self._discarded: set[ObjectId] = set()  # running nodes that must not be rescheduled
+        self._last_created_at: datetime | None = None
+        self._synced_at = 0.0
+        self._full_synced_at = 0.0
+        self._is_running = False
+        self._spread_pending = True  # spread overdue nodes before the next checks
+        self._slot_freed: anyio.Event | None = None  # set when a check finishes, the loop waits on it while all slots are busy
+
+    @property
+    def size(self) -> int:
+        """Count of scheduled nodes."""
+        return len(self._due.keys() | self._queued | self._running)
+
+    @property
+    def in_flight(self) -> int:
+        """Count of checks running right now."""
+        return len(self._running)
+
+    @property
+    def backlog(self) -> int:
+        """Count of due nodes waiting for a slot."""
+        return len(self._queued)
+
+    def schedule(self, id: ObjectId, due: float) -> None:
+        """Schedule a node check at the given unix time, replacing any previous due time."""
+        if id in self._discarded or self.core.services.node.check_workers > 0:
+            return
+        self._due[id] = due
+        heapq.heappush(self._heap, (due, id))
+
+    def discard(self, id: ObjectId) -> None:
+        """Stop scheduling a node, its heap and queue entries become stale."""
+        self._due.pop(id, None)
+        self._queued.pop(id, None)
+        if id in self._running:
+            self._discarded.add(id)
+
+    async def sync(self, full: bool = False) -> None:
+        """Load new nodes from the node collection; a full sync also drops nodes deleted from it."""
+        query: dict[str, object] = {}
+        if not full and self._last_created_at is not None:
+            query = {"created_at": {"$gte": self._last_created_at}}
+        seen: set[ObjectId] = set()
+        projection = {"network": 1, "url": 1, "next_check_at": 1, "created_at": 1}
+        started = time.perf_counter()
+        async for doc in self.core.db.node.collection.find(query, projection):
+            id = doc["_id"]
+            seen.add(id)
+            if self._last_created_at is None or doc["created_at"] > self._last_created_at:
+                self._last_created_at = doc["created_at"]
+            if id in self._due or id in self._queued or id in self._running:
+                continue
+            self._keys[id] = batch_key(doc["url"], Network(doc["network"]))
+            next_check_at = doc.get("next_check_at")
+            self.schedule(id, timestamp(next_check_at) if next_check_at else time.time())
+        MONGO_OP_SECONDS.observe(time.perf_counter() - started, "node", "sync")
+
+        now = time.monotonic()
+        self._synced_at = now
+        if full:
+            self._full_synced_at = now
+            for id in (self._due.keys() | self._queued) - seen:
+                self.discard(id)
+            for id in self._keys.keys() - seen - self._running:
+                del self._keys[id]
+
+    async def run(self) -> None:
+        """Run the scheduling loop until cancelled. A second concurrent call returns immediately."""
+        if self._is_running:
+            return
+        self._is_running = True
+        try:
+            concurrency = self.core.services.node.concurrency
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(concurrency.run, lambda: (self.in_flight, self.backlog), name="adaptive_concurrency")
+                while True:
+                    if self.core.services.node.check_workers > 0:
+                        await anyio.sleep(IDLE_SLEEP)
+                        continue
+                    await self._maybe_sync()
+                    if not self.core.settings.auto_check:
+                        self._spread_pending = True
+                        await anyio.sleep(IDLE_SLEEP)
+                        continue
+                    if self._spread_pending:
+                        self._spread_pending = False
+                        self._spread_overdue()
+                    free = concurrency.limit - self.in_flight
+                    if free <= 0:
+                        self._slot_freed = anyio.Event()
+                        await self._slot_freed.wait()
+                        continue
+                    self._queue_due()
+                    batch = self._take_batch(min(free, max(1, self.core.settings.check_batch_size)))
+                    if not batch:
+                        await anyio.sleep(self._idle_time())
+                        continue
+                    proxy = self.core.services.proxy.choose_for_batch(self._keys[batch[0]]) if len(batch) > 1 else None
+                    for id in batch:
+                        tg.start_soon(self._check_node, id, proxy, name=f"check_node_{id}")
+        finally:
+            self._is_running = False
+
+    async def _maybe_sync(self) -> None:
+        now = time.monotonic()
+        if now - self._full_synced_at >= FULL_SYNC_INTERVAL:
+            await self.sync(full=True)
+        elif now - self._synced_at >= SYNC_INTERVAL:
+            await self.sync()
+
+    def _queue_due(self) -> None:
+        """Move all due nodes from the heap to their batch key queues, dropping stale heap entries."""
+        now = time.time()
+        while self._heap:
+            due, id = self._heap[0]
+            if self._due.get(id) == due and due > now:
+                return
+            heapq.heappop(self._heap)
+            if self._due.get(id) != due:
+                continue
+            del self._due[id]
+            self._queued[id] = due
+            self._ready.setdefault(self._keys.get(id, str(id)), deque()).append(id)
+
+    def _spread_overdue(self) -> None:
+        """Reschedule overdue and queued nodes over one check interval by their stable offsets."""
+        now = time.time()
+        interval = self.core.settings.check_interval
+        overdue = [id for id, due in self._due.items() if due <= now]
+        for id in [*overdue, *self._queued]:
+            self._queued.pop(id, None)
+            self.schedule(id, now + interval * spread_offset(id))
+
+    def _take_batch(self, size: int) -> list[ObjectId]:
+        """Take up to size queued nodes of the next batch key and mark them running. The key moves to the end of the line.
+
+        Each node takes a rate limit token of its host. When the host has none left, the rest of the key is deferred.
+        """
+        now = time.time()
+        rate_limits = self.core.services.node.rate_limits
+        while self._ready:
+            key = next(iter(self._ready))
+            ids = self._ready.pop(key)
+            host = batch_key_host(key)
+            batch: list[ObjectId] = []
+            wait = 0.0
+            while ids and len(batch) < size:
+                if ids[0] not in self._queued:
+                    ids.popleft()
+                    continue
+                wait = rate_limits.acquire(host)
+                if wait > 0:
+                    break
+                batch.append(ids.popleft())
+            if wait > 0 and not batch:
+                self._defer(ids, now + wait, rate_limits.interval(host))
+                continue
+            if ids:
+                self._ready[key] = ids
+            if batch:
+                for id in batch:
+                    SCHEDULER_LAG_SECONDS.observe(max(0.0, now - self._queued.pop(id)))
+                self._running.update(batch)
+                return batch
+        return []
+
+    def _defer(self, ids: deque[ObjectId], due: float, step: float) -> None:
+        """Move queued nodes back to the heap, the first one at due and each next one step seconds later."""
+        for id in ids:
+            if self._queued.pop(id, None) is not None:
+                self.schedule(id, due)
+                due += step
+
+    def _idle_time(self) -> float:
+        if not self._heap:
+            return IDLE_SLEEP
+        return min(IDLE_SLEEP, max(0.0, self._heap[0][0] - time.time()))
+
+    async def _check_node(self, id: ObjectId, proxy: str | None) -> None:
+        try:
+            await self.core.services.node.check(id, proxy=proxy)
+        except Exception:
+            logger.exception("check failed", extra={"node_id": str(id)})
+            if await self._is_deleted(id):
+                self.discard(id)
+        finally:
+            self._running.discard(id)
+            if self._slot_freed is not None:
+                self._slot_freed.set()
+            if id in self._discarded:
+                self._discarded.discard(id)
+            elif id not in self._due:  # the check failed before it could schedule itself
+                self.schedule(id, time.time() + self.core.settings.check_interval)
+
+    async def _is_deleted(self, id: ObjectId) -> bool:
+        """Whether a node is gone from the collection. False if Mongo fails too, the node stays scheduled."""
+        try:
+            return not await self.core.db.node.exists({"_id": id})
+        except Exception:
+            logger.exception("node lookup failed", extra={"node_id": str(id)})
+            return False
@@ -0,0 +1,81 @@
+"""Write-behind buffer for check results: batches Check inserts, Node updates and rollups into bulk Mongo writes."""
+
+import logging
+
+from bson import ObjectId
+from mm_concurrency import async_mutex
+from pymongo import UpdateOne
+
+from app.core.db import Check
+from app.core.metrics import MONGO_OP_SECONDS
+from app.core.rollups import RollupBuffer
+from app.core.types import AppCore
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 200  # flush as soon as this many results are buffered
+FLUSH_INTERVAL = 1  # seconds, the scheduler flushes whatever is buffered at this rate
+MAX_PENDING = 5000  # backpressure: writers wait for a flush when the buffer reaches this size
+
+
+class CheckWriter:
+    """Collects check outcomes and writes them in bulk: checks with insert_many, node updates and rollups with bulk_write."""
+
+    def __init__(self, core: AppCore) -> None:
+        """Create a writer with an empty buffer."""
+        self.core = core
+        self._checks: list[Check] = []
+        self._updates: list[UpdateOne] = []
+        self._rollups = RollupBuffer()
+        self._flushing = False
+
+    @property
+    def pending(self) -> int:
+        """Count of buffered check results."""
+        return len(self._checks)
+
+    async def add(self, check: Check, node_id: ObjectId, update: dict[str, object] | list[dict[str, object]]) -> None:
+        """Buffer a check and the node update it causes.
+
+        Flushes inline on the size threshold unless a flush is already running; waits for a flush when the buffer is full.
+        """
+        self._checks.append(check)
+        self._updates.append(UpdateOne({"_id": node_id}, update))
+        self._rollups.add(node_id, check)
+        if len(self._checks) >= MAX_PENDING or (len(self._checks) >= FLUSH_SIZE and not self._flushing):
+            await self.flush()
+
+    @async_mutex
+    async def flush(self) -> int:
+        """Write all buffered results, returns count of written checks."""
+        if not self._checks:
+            return 0
+        checks, self._checks = self._checks, []
+        updates, self._updates = self._updates, []
+        rollups = self._rollups.take()
+        self._flushing = True
+        try:
+            await self._write(checks, updates, rollups)
+        finally:
+            self._flushing = False
+        return len(checks)
+
+    async def _write(self, checks: list[Check], updates: list[UpdateOne], rollups: list[UpdateOne]) -> None:
+        try:
+            with MONGO_OP_SECONDS.time("check", "insert_many"):
+                await self.core.db.check.insert_many(checks, ordered=False)
+        except Exception:
+            logger.exception("insert checks failed", extra={"count": len(checks)})
+        try:
+            # ordered: two results of the same node in one batch must apply in check order
+            with MONGO_OP_SECONDS.time("node", "bulk_write"):
+                await self.core.db.node.collection.bulk_write(updates, ordered=True)
+        except Exception:
+            logger.exception("update nodes failed", extra={"count": len(updates)})
+        if not rollups:  # every check was a proxy failure
+            return
+        try:
+            with MONGO_OP_SECONDS.time("check_rollup", "bulk_write"):
+                await self.core.db.check_rollup.collection.bulk_write(rollups, ordered=False)
+        except Exception:
+            logger.exception("upsert rollups failed", extra={"count": len(rollups)})
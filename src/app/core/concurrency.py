@@ -0,0 +1,186 @@
+"""Adaptive concurrency: an AIMD controller for the number of checks in flight."""
+
+import time
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime
+
+import anyio
+from mm_std import utc
+from pydantic import BaseModel
+
+from app.core.db import NodeStatus
+from app.core.types import AppCore
+
+ADJUST_INTERVAL = 5  # seconds between limit adjustments
+LAG_PROBE_INTERVAL = 0.5  # seconds between event loop lag probes
+MAX_LOOP_LAG = 0.1  # seconds, more means the process is CPU-bound and more checks only inflate elapsed
+DECREASE_FACTOR = 0.75
+INCREASE_RATIO = 0.1  # grow by 10% of the limit, at least 1, per interval while due nodes wait for a slot
+LATENCY_INFLATION = 1.5  # ok-check latency above this multiple of its baseline shrinks the limit
+FAILURE_RATE_RISE = 0.1  # timeout and proxy error share above its baseline by this much shrinks the limit
+BASELINE_ALPHA = 0.1  # weight of a calm interval in the baselines
+MIN_SAMPLES = 20  # checks an interval needs before its latency and failure rate are judged
+ADJUSTMENTS_KEPT = 20
+
+
+class Adjustment(BaseModel):
+    """A change of the concurrency limit."""
+
+    at: datetime
+    limit_from: int
+    limit_to: int
+    reason: str
+
+
+class ConcurrencyStats(BaseModel):
+    """Current state of the concurrency controller."""
+
+    adaptive: bool
+    limit: int
+    floor: int
+    ceiling: int
+    in_flight: int
+    backlog: int  # due nodes waiting for a slot
+    loop_lag: float  # max event loop lag of the last interval, seconds
+    latency: float | None  # average elapsed of ok checks of the last interval
+    latency_baseline: float | None
+    failure_rate: float | None  # timeout and proxy error share of the last interval
+    failure_rate_baseline: float | None
+    adjustments: list[Adjustment]  # newest first
+
+
+class AdaptiveConcurrency:
+    """Grows the check limit additively while due nodes wait for busy slots, shrinks it multiplicatively on overload.
+
+    Overload is any of: event loop lag above MAX_LOOP_LAG, ok-check latency inflated over its baseline, or a timeout
+    and proxy error share rising over its baseline. Baselines move only in calm intervals, so a lasting overload does
+    not become the new normal. With `adaptive_concurrency` off, the limit is `limit_concurrent_checks`.
+    """
+
+    def __init__(self, core: AppCore) -> None:
+        """Create a controller without baselines, the limit starts at limit_concurrent_checks."""
+        self.core = core
+        self._limit: float | None = None
+        self._checks = 0
+        self._failures = 0  # timeouts and proxy errors
+        self._ok = 0
+        self._ok_elapsed = 0.0
+        self._max_lag = 0.0
+        self._latency_baseline: float | None = None
+        self._failure_baseline: float | None = None
+        self._last = ConcurrencyStats(
+            adaptive=False,
+            limit=0,
+            floor=0,
+            ceiling=0,
+            in_flight=0,
+            backlog=0,
+            loop_lag=0.0,
+            latency=None,
+            latency_baseline=None,
+            failure_rate=None,
+            failure_rate_baseline=None,
+            adjustments=[],
+        )
+        self._adjustments: deque[Adjustment] = deque(maxlen=ADJUSTMENTS_KEPT)
+
+    @property
+    def limit(self) -> int:
+        """Checks allowed in flight right now."""
+        settings = self.core.settings
+        if not settings.adaptive_concurrency:
+            return max(1, settings.limit_concurrent_checks)
+        if self._limit is None:
+            self._limit = float(settings.limit_concurrent_checks)
+        self._limit = min(max(self._limit, settings.concurrency_floor), settings.concurrency_ceiling)
+        return max(1, int(self._limit))
+
+    def record(self, status: NodeStatus, elapsed: float) -> None:
+        """Count a finished check in the current interval."""
+        self._checks += 1
+        if status in (NodeStatus.TIMEOUT, NodeStatus.PROXY):
+            self._failures += 1
+        elif status == NodeStatus.OK:
+            self._ok += 1
+            self._ok_elapsed += elapsed
+
+    async def run(self, load: Callable[[], tuple[int, int]]) -> None:
+        """Probe event loop lag and adjust the limit every ADJUST_INTERVAL until cancelled. load returns (in_flight, backlog)."""
+        adjusted_at = time.monotonic()
+        while True:
+            started = time.monotonic()
+            await anyio.sleep(LAG_PROBE_INTERVAL)
+            now = time.monotonic()
+            self._max_lag = max(self._max_lag, now - started - LAG_PROBE_INTERVAL)
+            if now - adjusted_at >= ADJUST_INTERVAL:
+                adjusted_at = now
+                self.adjust(*load())
+
+    def adjust(self, in_flight: int, backlog: int) -> None:
+        """Close the interval: shrink on overload, grow if due nodes wait for busy slots, then reset the counters."""
+        limit = self.limit
+        lag, self._max_lag = self._max_lag, 0.0
+        latency = self._ok_elapsed / self._ok if self._ok >= MIN_SAMPLES else None
+        failure_rate = self._failures / self._checks if self._checks >= MIN_SAMPLES else None
+        self._checks = self._failures = self._ok = 0
+        self._ok_elapsed = 0.0
+
+        reason = None
+        overloaded = True
+        if lag > MAX_LOOP_LAG:
+            reason = f"event loop lag {lag:.3f}s > {MAX_LOOP_LAG}s"
+        elif (
+            failure_rate is not None
+            and self._failure_baseline is not None
+            and failure_rate > self._failure_baseline + FAILURE_RATE_RISE
+        ):
+            reason = f"timeout and proxy error rate {failure_rate:.2f}, baseline {self._failure_baseline:.2f}"
+        elif latency is not None and self._latency_baseline is not None and latency > self._latency_baseline * LATENCY_INFLATION:
+            reason = f"ok check latency {latency:.3f}s, baseline {self._latency_baseline:.3f}s"
+        else:
+            overloaded = False
+            if backlog > 0 and in_flight >= limit:
+                reason = f"{backlog} due nodes wait, all {limit} slots busy"
+
+        if self.core.settings.adaptive_concurrency and reason is not None:
+            assert self._limit is not None  # noqa: S101 - set by self.limit
+            self._limit = self._limit * DECREASE_FACTOR if overloaded else self._limit + max(1.0, self._limit * INCREASE_RATIO)
+            new_limit = self.limit
+            if new_limit != limit:
+                self._adjustments.appendleft(Adjustment(at=utc(), limit_from=limit, limit_to=new_limit, reason=reason))
+        if not overloaded:
+            self._latency_baseline = _ewma(self._latency_baseline, latency)
+            self._failure_baseline = _ewma(self._failure_baseline, failure_rate)
+
+        settings = self.core.settings
+        self._last = ConcurrencyStats(
+            adaptive=settings.adaptive_concurrency,
+            limit=self.limit,
+            floor=settings.concurrency_floor,
+            ceiling=settings.concurrency_ceiling,
+            in_flight=in_flight,
+            backlog=backlog,
+            loop_lag=round(lag, 4),
+            latency=_round(latency),
+            latency_baseline=_round(self._latency_baseline),
+            failure_rate=_round(failure_rate),
+            failure_rate_baseline=_round(self._failure_baseline),
+            adjustments=[],
+        )
+
+    def stats(self) -> ConcurrencyStats:
+        """State as of the last adjustment, with the current limit and recent adjustments."""
+        return self._last.model_copy(update={"limit": self.limit, "adjustments": list(self._adjustments)})
+
+
+def _ewma(baseline: float | None, value: float | None) -> float | None:
+    if value is None:
+        return baseline
+    if baseline is None:
+        return value
+    return baseline + BASELINE_ALPHA * (value - baseline)
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
@@ -11,6 +11,9 @@ from mm_web3 import Network
 from pydantic import Field
 from pymongo import IndexModel
 
+HISTORY_SIZE = 100  # count of last check results kept in Node.history
+RAW_CHECK_TTL = 3 * 60 * 60  # seconds raw checks are kept, rollups keep the long-term stats
+
 
 @enum.unique
 class NodeStatus(enum.StrEnum):
@@ -20,6 +23,7 @@ class NodeStatus(enum.StrEnum):
     OK = "ok"
     TIMEOUT = "timeout"
     PROXY = "proxy"
+    RATE_LIMITED = "rate_limited"  # the provider throttled the check, not a node failure
     UNKNOWN_RESPONSE = "unknown_response"
     ERROR = "error"
 
@@ -30,6 +34,8 @@ class NodeStatus(enum.StrEnum):
             return cls.TIMEOUT
         if error == "proxy":
             return cls.PROXY
+        if error == "rate_limited":
+            return cls.RATE_LIMITED
         if error == "unknown_response":
             return cls.UNKNOWN_RESPONSE
         return cls.ERROR
@@ -42,23 +48,70 @@ class Node(MongoModel[ObjectId]):
     url: str
     status: NodeStatus = NodeStatus.NOT_CHECKED
     height: int | None = None  # latest block number or slot
-    check_history: list[bool] = Field(default_factory=list)  # keep last 100 check results; ok=true, down=false
+    elapsed: float | None = None  # response time of the last check, seconds
+    history: str = ""  # last HISTORY_SIZE check results, newest first; "1" = ok, "0" = down; proxy failures are left out
+    history_ok_count: int = 0  # count of "1" in history, maintained by the check update
+    history_down_count: int = 0  # count of "0" in history, maintained by the check update
     checked_at: datetime | None = None  # last check
+    next_check_at: datetime | None = None  # when the scheduler checks the node next, None = as soon as possible
     last_ok_at: datetime | None = None
+    lease_owner: str | None = None  # check worker that claimed the node, see LeaseChecker
+    lease_until: datetime | None = None  # the claim expires then, so nodes of a crashed worker are claimed again
     created_at: datetime = Field(default_factory=utc)
 
-    @property
-    def history_ok_count(self) -> int:
-        """Count of successful checks in history."""
-        return len([x for x in self.check_history if x is True])
-
-    @property
-    def history_down_count(self) -> int:
-        """Count of failed checks in history."""
-        return len([x for x in self.check_history if x is False])
+    @staticmethod
+    def check_update(ok: bool | None, fields: dict[str, object]) -> list[dict[str, object]]:
+        """Build an update pipeline that sets fields and prepends a check result to history in one atomic server-side write.
+
+        The evicted oldest result is read in the same stage, so the counters are adjusted in O(1) without a list scan.
+        ok=None sets the fields only: a check that says nothing about the node is kept out of history.
+        """
+        set_fields = {key: {"$literal": value} for key, value in fields.items()}
+        if ok is None:
+            return [Node._migrate_history(), {"$set": set_fields}, {"$unset": "check_history"}]
+        evicted = {"$substrBytes": ["$history", HISTORY_SIZE - 1, 1]}
+
+        def dropped(value: str) -> dict[str, object]:
+            return {"$cond": [{"$eq": [evicted, value]}, -1, 0]}
+
+        return [
+            Node._migrate_history(),
+            {
+                "$set": set_fields
+                | {
+                    "history": {"$substrBytes": [{"$concat": ["1" if ok else "0", "$history"]}, 0, HISTORY_SIZE]},
+                    "history_ok_count": {"$add": ["$history_ok_count", int(ok), dropped("1")]},
+                    "history_down_count": {"$add": ["$history_down_count", int(not ok), dropped("0")]},
+                }
+            },
+            {"$unset": "check_history"},
+        ]
+
+    @staticmethod
+    def _migrate_history() -> dict[str, object]:
+        """Build history and its counters from check_history, the list[bool] history of older versions, if they are missing."""
+        legacy = {"$slice": [{"$ifNull": ["$check_history", []]}, HISTORY_SIZE]}  # newest first, like history
+        ok_count = {"$size": {"$filter": {"input": legacy, "cond": {"$eq": ["$$this", True]}}}}
+        legacy_history = {
+            "$reduce": {"input": legacy, "initialValue": "", "in": {"$concat": ["$$value", {"$cond": ["$$this", "1", "0"]}]}}
+        }
+        return {
+            "$set": {
+                "history": {"$ifNull": ["$history", legacy_history]},
+                "history_ok_count": {"$ifNull": ["$history_ok_count", ok_count]},
+                "history_down_count": {"$ifNull": ["$history_down_count", {"$subtract": [{"$size": legacy}, ok_count]}]},
+            }
+        }
 
     __collection__ = "node"
-    __indexes__ = ["network", "!url", "last_ok_at"]
+    __indexes__ = [
+        "!url",
+        "last_ok_at",  # live index load and the checked-node sync
+        "created_at",  # incremental scheduler sync
+        IndexModel([("next_check_at", 1), ("lease_until", 1)]),  # lease claim: the lease filter is read from the index
+        IndexModel([("network", 1), ("url", 1)]),  # export and the nodes page of one network
+        IndexModel([("network", 1), ("_id", 1)]),  # API pages of one network
+    ]
 
 
 class Check(MongoModel[ObjectId]):
@@ -69,11 +122,71 @@ class Check(MongoModel[ObjectId]):
     proxy: str | None
     status: NodeStatus
     elapsed: float  # response time in seconds
-    response: dict[str, object]
+    response: dict[str, object]  # empty for ok checks that were not sampled
+    height: int | None = None
     created_at: datetime = Field(default_factory=utc)
 
     __collection__ = "check"
-    __indexes__ = ["network", IndexModel([("created_at", -1)], expireAfterSeconds=3 * 60 * 60)]
+    __indexes__ = [
+        IndexModel([("created_at", -1)], expireAfterSeconds=RAW_CHECK_TTL),
+        IndexModel([("network", 1), ("_id", -1)]),  # API pages of one network, newest first
+        IndexModel([("url", 1), ("_id", -1)]),  # API pages of one node, newest first
+    ]
+
+
+@enum.unique
+class RollupPeriod(enum.StrEnum):
+    """Bucket size of check rollups."""
+
+    MINUTE = "minute"
+    HOUR = "hour"
+
+    @property
+    def seconds(self) -> int:
+        """Bucket size in seconds."""
+        return 60 if self == RollupPeriod.MINUTE else 3600
+
+    @property
+    def retention(self) -> int:
+        """Seconds buckets of this period are kept."""
+        return 2 * 24 * 3600 if self == RollupPeriod.MINUTE else 90 * 24 * 3600
+
+
+class CheckRollup(MongoModel[ObjectId]):
+    """Check stats of a node in one minute or hour bucket, upserted by the check writer.
+
+    Latency and height stats cover ok checks only.
+    """
+
+    node_id: ObjectId
+    network: Network
+    url: str
+    period: RollupPeriod
+    bucket: datetime  # bucket start
+    ok_count: int = 0
+    fail_count: int = 0
+    elapsed_sum: float = 0  # of ok checks, avg = elapsed_sum / ok_count
+    elapsed_min: float | None = None
+    elapsed_max: float | None = None
+    height_min: int | None = None
+    height_max: int | None = None
+    expire_at: datetime  # bucket + period retention, TTL
+
+    __collection__ = "check_rollup"
+    __indexes__ = [
+        IndexModel([("node_id", 1), ("period", 1), ("bucket", 1)], unique=True),
+        IndexModel([("network", 1), ("period", 1), ("bucket", 1)]),
+        IndexModel([("expire_at", 1)], expireAfterSeconds=0),
+    ]
+
+
+class AdmittedProxies(MongoModel[str]):
+    """The proxy list admitted by the web process, check workers reload their pool from it."""
+
+    proxies: list[str]
+    updated_at: datetime = Field(default_factory=utc)
+
+    __collection__ = "admitted_proxies"
 
 
 class Db(BaseDb):
@@ -81,3 +194,5 @@ class Db(BaseDb):
 
     node: AsyncMongoCollection[ObjectId, Node]
     check: AsyncMongoCollection[ObjectId, Check]
+    check_rollup: AsyncMongoCollection[ObjectId, CheckRollup]
+    admitted_proxies: AsyncMongoCollection[str, AdmittedProxies]
@@ -0,0 +1,79 @@
+"""Caching DNS resolver shared by all pooled HTTP sessions, with negative caching of failed lookups."""
+
+import asyncio
+import socket
+import time
+
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+DNS_TTL = 300  # seconds a successful lookup is reused
+DNS_NEGATIVE_TTL = 60  # seconds a failed lookup is remembered, so dead hosts fail without a new lookup
+DNS_MAX_SIZE = 50_000  # cached lookups
+
+_Key = tuple[str, int, socket.AddressFamily]
+
+
+class CachingResolver(AbstractResolver):
+    """Wraps the default aiohttp resolver with one cache for all connectors.
+
+    aiohttp caches lookups per connector, and there is a connector per (proxy, host) session, so the same host
+    used to be resolved once per proxy. Failed lookups are cached too, and concurrent lookups of one host share
+    a single query.
+    """
+
+    def __init__(self, ttl: float = DNS_TTL, negative_ttl: float = DNS_NEGATIVE_TTL, max_size: int = DNS_MAX_SIZE) -> None:
+        """Create an empty cache, failed lookups are kept for negative_ttl seconds."""
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._resolver: AbstractResolver | None = None
+        self._cache: dict[_Key, tuple[float, list[ResolveResult] | OSError]] = {}  # key -> (expires, result)
+        self._pending: dict[_Key, asyncio.Task[list[ResolveResult] | OSError]] = {}
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET) -> list[ResolveResult]:
+        """Resolve a host, from the cache if possible. Raises OSError if the host does not resolve."""
+        key = (host, port, family)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            result = cached[1]
+        else:
+            task = self._pending.get(key)
+            if task is None:
+                self.misses += 1
+                task = self._pending[key] = asyncio.ensure_future(self._lookup(key))
+            result = await asyncio.shield(task)
+        if isinstance(result, OSError):
+            raise type(result)(result.errno, result.strerror)
+        return list(result)
+
+    async def close(self) -> None:
+        """Close the wrapped resolver."""
+        if self._resolver is not None:
+            await self._resolver.close()
+
+    async def _lookup(self, key: _Key) -> list[ResolveResult] | OSError:
+        if self._resolver is None:
+            self._resolver = DefaultResolver()
+        result: list[ResolveResult] | OSError
+        try:
+            result = await self._resolver.resolve(*key)
+            ttl = self.ttl
+        except OSError as e:
+            result = e
+            ttl = self.negative_ttl
+        finally:
+            self._pending.pop(key, None)
+        if len(self._cache) >= self.max_size:
+            self._evict()
+        self._cache[key] = (time.monotonic() + ttl, result)
+        return result
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        self._cache = {key: value for key, value in self._cache.items() if value[0] > now}
+        while len(self._cache) >= self.max_size:
+            del self._cache[next(iter(self._cache))]
@@ -0,0 +1,91 @@
+"""In-process pub/sub of node events, served to clients as Server-Sent Events."""
+
+import asyncio
+import json
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+
+from mm_web3 import Network
+
+from app.core.metrics import EVENTS_DROPPED_TOTAL
+
+EVENT_QUEUE_SIZE = 1000  # messages buffered per subscriber, the oldest are dropped beyond that
+HEARTBEAT_INTERVAL = 15  # seconds, an SSE comment keeps idle connections open through proxies
+
+
+class Subscription:
+    """Bounded drop-oldest queue of encoded SSE messages of one client."""
+
+    def __init__(self, network: Network | None, maxsize: int = EVENT_QUEUE_SIZE) -> None:
+        """Create an empty subscription to events of network, or of all networks if it is None."""
+        self.network = network
+        self.dropped = 0  # dropped since the client was last told
+        self._queue: deque[bytes] = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+
+    def put(self, message: bytes) -> None:
+        """Queue a message, dropping the oldest one if the queue is full. Never blocks the publisher."""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            EVENTS_DROPPED_TOTAL.inc()
+        self._queue.append(message)
+        self._ready.set()
+
+    async def next_message(self, timeout: float = HEARTBEAT_INTERVAL) -> bytes:
+        """Next message; a `dropped` event after an overflow, a heartbeat comment if nothing came within timeout."""
+        if self.dropped:
+            message = encode("dropped", {"count": self.dropped})
+            self.dropped = 0
+            return message
+        if not self._queue:
+            self._ready.clear()
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._ready.wait()
+            except TimeoutError:
+                return b": ping\n\n"
+        return self._queue.popleft()
+
+
+def encode(event: str, data: dict[str, object]) -> bytes:
+    """Encode an SSE message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n".encode()
+
+
+class EventBus:
+    """Fans events out to subscribers. A message is encoded once per publish, not once per subscriber."""
+
+    def __init__(self) -> None:
+        """Create a bus without subscribers."""
+        self._subscribers: set[Subscription] = set()
+
+    def __len__(self) -> int:
+        """Count of subscribers."""
+        return len(self._subscribers)
+
+    def publish(self, event: str, network: Network, data: dict[str, object]) -> None:
+        """Send an event to subscribers of all networks and of its network."""
+        if not self._subscribers:
+            return
+        message = encode(event, data | {"network": network.value})
+        for subscription in self._subscribers:
+            if subscription.network is None or subscription.network == network:
+                subscription.put(message)
+
+    @contextmanager
+    def subscribe(self, network: Network | None = None) -> Iterator[Subscription]:
+        """Subscribe to events of one network or of all networks while the block runs."""
+        subscription = Subscription(network)
+        self._subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscribers.discard(subscription)
+
+    async def stream(self, network: Network | None = None, initial: list[bytes] | None = None) -> AsyncIterator[bytes]:
+        """SSE body of a subscription that starts with the initial messages, runs until the client disconnects."""
+        with self.subscribe(network) as subscription:
+            yield b"retry: 3000\n\n" + b"".join(initial or [])
+            while True:
+                yield await subscription.next_message()
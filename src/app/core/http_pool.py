@@ -0,0 +1,357 @@
+"""Pooled keep-alive HTTP sessions for RPC probes, keyed by (proxy, host)."""
+
+import asyncio
+import contextlib
+import json
+import socket
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from types import SimpleNamespace
+from typing import Any
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp_socks import ProxyConnectionError, ProxyConnector, ProxyError, ProxyTimeoutError
+from mm_result import Result
+from pydantic import BaseModel
+
+from app.core.dns_cache import CachingResolver
+from app.core.metrics import RPC_PHASE_SECONDS
+from app.core.rate_limit import parse_retry_after
+
+MAX_RESPONSE_SIZE = 64 * 1024  # bytes, a height response is under 1 KiB; larger bodies are aborted unread
+READ_CHUNK = 16 * 1024
+STORED_BODY_SIZE = 2048  # bytes of the body kept in check records
+PROBE_TIMEOUT = 0.8  # seconds for the DNS and TCP pre-probe, a slower host is left to the full request
+PROBE_REACHABLE_TTL = 60  # seconds a host that accepted a TCP connection skips the pre-probe
+PROBE_ERRORS = frozenset({"dns", "unreachable"})  # failure reasons of the pre-probe, no proxy was involved
+
+
+class UnknownResponseError(ValueError):
+    """The body is not a JSON object."""
+
+
+def _label(ctx: SimpleNamespace) -> str:
+    """Label passed to the request via trace_request_ctx."""
+    return ctx.trace_request_ctx["label"] if ctx.trace_request_ctx else "other"
+
+
+@dataclass(slots=True)
+class HttpResponse:
+    """Outcome of a pooled HTTP request.
+
+    `error` is set on transport errors: timeout, proxy, invalid_url, dns, connection, error; to unknown_response
+    if the body exceeded the size limit, and to rate_limited on HTTP 429.
+    """
+
+    status_code: int | None = None
+    body: bytes | None = None
+    error: str | None = None
+    error_message: str | None = None
+    label: str = "other"  # network type of the probe, the metrics label
+    retry_after: float | None = None  # seconds from the Retry-After header of a 429
+
+    def is_err(self) -> bool:
+        """Tell whether there was a transport error or a non-2xx status."""
+        return self.error is not None or self.status_code is None or self.status_code >= 400
+
+    def json_object(self) -> dict[str, Any]:
+        """Parse the body as a JSON object. Raises UnknownResponseError on anything else, HTML pages fail before parsing."""
+        if not self.body or self.body.lstrip()[:1] != b"{":
+            raise UnknownResponseError("not a json object")
+        with RPC_PHASE_SECONDS.time(self.label, "parse"):
+            try:
+                doc = json.loads(self.body)
+            except ValueError as e:
+                raise UnknownResponseError(f"invalid json: {e}") from e
+        if not isinstance(doc, dict):
+            raise UnknownResponseError("not a json object")
+        return doc
+
+    def to_dict(self) -> dict[str, object]:
+        """Serialize for logging and storage, the body is cut to STORED_BODY_SIZE bytes."""
+        body = self.body[:STORED_BODY_SIZE].decode(errors="replace") if self.body is not None else None
+        return {
+            "status_code": self.status_code,
+            "body": body,
+            "error": self.error,
+            "error_message": self.error_message,
+            "retry_after": self.retry_after,
+        }
+
+    def to_result_ok(self, value: int) -> Result[int]:
+        """Build a successful result with the response attached."""
+        return Result.ok(value, extra=self.to_dict())
+
+    def to_result_err(self, error: str | Exception | None = None) -> Result[int]:
+        """Build an error result with the response attached. Defaults to the transport error or the HTTP status."""
+        return Result.err(error or self.error or f"http_{self.status_code}", extra=self.to_dict())
+
+    def to_result_unknown(self, cause: Exception) -> Result[int]:
+        """Build an unknown_response error result: the body is not what the RPC method returns."""
+        return Result.err("unknown_response", extra=self.to_dict() | {"error_message": f"{type(cause).__name__}: {cause}"})
+
+
+async def _read_limited(res: aiohttp.ClientResponse, max_size: int) -> bytes | None:
+    """Read the body, None as soon as it is known to exceed max_size."""
+    if res.content_length is not None and res.content_length > max_size:
+        return None
+    body = bytearray()
+    while chunk := await res.content.read(READ_CHUNK):
+        body += chunk
+        if len(body) > max_size:
+            return None
+    return bytes(body)
+
+
+class HttpPoolStats(BaseModel):
+    """Connection reuse counters of an HttpPool."""
+
+    sessions: int = 0
+    sessions_created: int = 0
+    sessions_evicted: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    requests: int = 0
+    dns_hits: int = 0
+    dns_misses: int = 0
+
+
+@dataclass(slots=True)
+class _PooledSession:
+    session: aiohttp.ClientSession
+    used_at: float
+    slots: asyncio.Semaphore | None  # limit_per_host connections, None = unlimited
+    in_use: int = 0
+
+
+class HttpPool:
+    """Keep-alive aiohttp sessions shared by all probes, one session per (proxy, host).
+
+    Reusing a session skips the TCP connect, TLS handshake and proxy CONNECT of every probe after the first one.
+    Sessions idle for longer than `idle_timeout` are closed by `evict_idle`. With `limit_per_host` 0 a session opens
+    as many connections as there are requests in flight, so the concurrent check limit bounds them. A positive limit
+    makes requests wait for a free connection before their timeout starts, so a queued probe is not a TIMEOUT.
+    Phase timings (dns, connect, headers, read) are recorded in `rpc_phase_seconds` under the request label.
+    """
+
+    def __init__(
+        self, limit_per_host: int = 0, max_sessions: int = 2000, idle_timeout: float = 180, keepalive_timeout: float = 90
+    ) -> None:
+        """Create an empty pool, sessions are opened on first use of a (proxy, host)."""
+        self.limit_per_host = limit_per_host
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.resolver = CachingResolver()
+        self._sessions: dict[tuple[str | None, str], _PooledSession] = {}
+        self._reachable: dict[tuple[str, int], float] = {}  # (host, port) -> monotonic time the probe result expires
+        self._closing: set[asyncio.Task[None]] = set()
+        self._stats = HttpPoolStats()
+        self._trace = aiohttp.TraceConfig()
+        self._trace.on_request_start.append(self._on_request_start)
+        self._trace.on_dns_resolvehost_start.append(self._on_dns_start)
+        self._trace.on_dns_resolvehost_end.append(self._on_dns_end)
+        self._trace.on_connection_create_start.append(self._on_connection_create_start)
+        self._trace.on_connection_create_end.append(self._on_connection_create)
+        self._trace.on_connection_reuseconn.append(self._on_connection_reuse)
+        self._trace.on_request_end.append(self._on_request_end)
+
+    @property
+    def stats(self) -> HttpPoolStats:
+        """Current counters."""
+        return self._stats.model_copy(
+            update={"sessions": len(self._sessions), "dns_hits": self.resolver.hits, "dns_misses": self.resolver.misses}
+        )
+
+    async def request(
+        self,
+        url: str,
+        *,
+        method: str = "get",
+        json: object = None,
+        proxy: str | None = None,
+        timeout: float = 5,
+        label: str = "other",
+        max_size: int = MAX_RESPONSE_SIZE,
+    ) -> HttpResponse:
+        """Send a request over a pooled session. Transport errors are returned in the response, never raised.
+
+        A body over max_size bytes is not downloaded: the request is aborted as soon as the Content-Length header or
+        the bytes read so far exceed it, and the connection is dropped instead of drained.
+        """
+        try:
+            key = (proxy, urlsplit(url).netloc)
+        except ValueError as e:
+            return HttpResponse(error="invalid_url", error_message=str(e), label=label)
+
+        pooled = self._acquire(key)
+        self._stats.requests += 1
+        http_proxy = proxy if proxy and proxy.startswith("http") else None
+        try:
+            async with (
+                pooled.slots or contextlib.nullcontext(),
+                pooled.session.request(
+                    method,
+                    url,
+                    json=json,
+                    proxy=http_proxy,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                    trace_request_ctx={"label": label},
+                ) as res,
+            ):
+                with RPC_PHASE_SECONDS.time(label, "read"):
+                    body = await _read_limited(res, max_size)
+                if body is None:
+                    message = f"response larger than {max_size} bytes"
+                    return HttpResponse(status_code=res.status, error="unknown_response", error_message=message, label=label)
+                if res.status == HTTPStatus.TOO_MANY_REQUESTS:
+                    return HttpResponse(
+                        status_code=res.status,
+                        body=body,
+                        error="rate_limited",
+                        error_message=f"retry after {res.headers.get('Retry-After')}",
+                        label=label,
+                        retry_after=parse_retry_after(res.headers.get("Retry-After")),
+                    )
+                return HttpResponse(status_code=res.status, body=body, label=label)
+        except (TimeoutError, ProxyTimeoutError) as e:
+            return HttpResponse(error="timeout", error_message=str(e), label=label)
+        except (aiohttp.ClientProxyConnectionError, aiohttp.ClientHttpProxyError, ProxyError, ProxyConnectionError) as e:
+            return HttpResponse(error="proxy", error_message=str(e), label=label)
+        except aiohttp.InvalidURL as e:
+            return HttpResponse(error="invalid_url", error_message=str(e), label=label)
+        except aiohttp.ClientConnectorDNSError as e:  # with an http proxy it is the proxy host that did not resolve
+            return HttpResponse(error="proxy" if http_proxy else "dns", error_message=str(e), label=label)
+        except aiohttp.ClientConnectorError as e:
+            return HttpResponse(error="connection", error_message=str(e), label=label)
+        except Exception as e:
+            return HttpResponse(error="error", error_message=str(e), label=label)
+        finally:
+            pooled.in_use -= 1
+            pooled.used_at = time.monotonic()
+
+    async def probe(self, url: str, proxy: str | None = None, timeout: float = PROBE_TIMEOUT) -> str | None:
+        """Fast reachability pre-check of a direct request: resolve the host and open a TCP connection.
+
+        Returns "dns" or "unreachable" if the full request is bound to fail, else None. A slow lookup or connect
+        is not a failure, the full request decides. Hosts that accepted a connection skip the probe for a while.
+        With a proxy it always returns None: the proxy resolves and connects to the host itself.
+        """
+        if proxy:
+            return None
+        try:
+            parts = urlsplit(url)
+            host, port = parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+        except ValueError:
+            return None  # the full request reports invalid_url
+        if not host or self._reachable.get((host, port), 0) > time.monotonic():
+            return None
+        try:
+            async with asyncio.timeout(timeout):
+                addresses = await self.resolver.resolve(host, port, socket.AF_UNSPEC)
+                if not addresses:
+                    return "dns"
+                _, writer = await asyncio.open_connection(addresses[0]["host"], port)
+                writer.close()
+        except TimeoutError:
+            return None
+        except socket.gaierror:
+            return "dns"
+        except OSError:  # refused, host or network unreachable
+            return "unreachable"
+        self._reachable[(host, port)] = time.monotonic() + PROBE_REACHABLE_TTL
+        return None
+
+    async def evict_idle(self) -> int:
+        """Close sessions idle for longer than idle_timeout, returns count of closed sessions."""
+        now = time.monotonic()
+        self._reachable = {key: expires for key, expires in self._reachable.items() if expires > now}
+        deadline = now - self.idle_timeout
+        keys = [key for key, pooled in self._sessions.items() if pooled.in_use == 0 and pooled.used_at < deadline]
+        for key in keys:
+            await self._close(key)
+        return len(keys)
+
+    async def close_proxy(self, proxy: str) -> int:
+        """Close idle sessions through a proxy, returns count of closed sessions. Busy ones are left to evict_idle."""
+        keys = [key for key, pooled in self._sessions.items() if key[0] == proxy and pooled.in_use == 0]
+        for key in keys:
+            await self._close(key)
+        return len(keys)
+
+    async def close(self) -> None:
+        """Close all sessions."""
+        for key in list(self._sessions):
+            await self._close(key)
+        await self.resolver.close()
+
+    def _acquire(self, key: tuple[str | None, str]) -> _PooledSession:
+        pooled = self._sessions.get(key)
+        if pooled is None or pooled.session.closed:
+            if len(self._sessions) >= self.max_sessions:
+                self._evict_lru()
+            slots = asyncio.Semaphore(self.limit_per_host) if self.limit_per_host > 0 else None
+            pooled = _PooledSession(session=self._create_session(key[0]), used_at=time.monotonic(), slots=slots)
+            self._sessions[key] = pooled
+            self._stats.sessions_created += 1
+        pooled.in_use += 1
+        return pooled
+
+    def _create_session(self, proxy: str | None) -> aiohttp.ClientSession:
+        connector: aiohttp.TCPConnector
+        if proxy and proxy.startswith("socks"):
+            connector = ProxyConnector.from_url(
+                proxy,
+                limit=0,  # connections are limited by slots, outside the request timeout
+                keepalive_timeout=self.keepalive_timeout,
+                resolver=self.resolver,
+                use_dns_cache=False,
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=0,  # connections are limited by slots, outside the request timeout
+                keepalive_timeout=self.keepalive_timeout,
+                resolver=self.resolver,
+                use_dns_cache=False,
+            )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[self._trace])
+
+    def _evict_lru(self) -> None:
+        idle = [key for key, pooled in self._sessions.items() if pooled.in_use == 0]
+        if not idle:
+            return
+        pooled = self._sessions.pop(min(idle, key=lambda key: self._sessions[key].used_at))
+        self._stats.sessions_evicted += 1
+        task = asyncio.get_running_loop().create_task(pooled.session.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, key: tuple[str | None, str]) -> None:
+        pooled = self._sessions.pop(key, None)
+        if pooled is not None:
+            self._stats.sessions_evicted += 1
+            await pooled.session.close()
+
+    async def _on_request_start(self, _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: object) -> None:
+        ctx.started = time.perf_counter()
+
+    async def _on_dns_start(self, _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: object) -> None:
+        ctx.dns_started = time.perf_counter()
+
+    async def _on_dns_end(self, _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: object) -> None:
+        RPC_PHASE_SECONDS.observe(time.perf_counter() - ctx.dns_started, _label(ctx), "dns")
+
+    async def _on_connection_create_start(self, _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: object) -> None:
+        ctx.connect_started = time.perf_counter()
+
+    async def _on_connection_create(self, _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: object) -> None:
+        self._stats.connections_created += 1
+        RPC_PHASE_SECONDS.observe(time.perf_counter() - ctx.connect_started, _label(ctx), "connect")
+
+    async def _on_request_end(self, _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: object) -> None:
+        RPC_PHASE_SECONDS.observe(time.perf_counter() - ctx.started, _label(ctx), "headers")
+
+    async def _on_connection_reuse(self, _session: aiohttp.ClientSession, _ctx: SimpleNamespace, _params: object) -> None:
+        self._stats.connections_reused += 1
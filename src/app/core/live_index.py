@@ -0,0 +1,85 @@
+"""In-memory index of live nodes, served as a precomputed JSON snapshot."""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+
+from mm_web3 import Network
+
+LIVE_WINDOW = 5 * 60  # seconds, a node is live if it responded successfully within this window
+
+
+@dataclass(frozen=True, slots=True)
+class LiveSnapshot:
+    """Live node URLs grouped by network, rendered once per membership change."""
+
+    version: int
+    etag: str
+    body: bytes
+
+
+class LiveIndex:
+    """Per-network sets of live nodes with their last successful check time.
+
+    The check path calls `mark_ok`; `snapshot` expires stale nodes and re-renders the JSON body only when
+    the set of live nodes changes. All methods are synchronous, so readers never wait on a lock.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty index, nodes are added by mark_ok."""
+        self.loaded = False
+        self._last_ok: dict[Network, dict[str, float]] = {network: {} for network in Network}  # url -> last ok timestamp
+        self._version = 0
+        self._snapshot: LiveSnapshot | None = None
+        self._next_expiry = float("inf")
+
+    def mark_ok(self, network: Network, url: str, at: float) -> None:
+        """Record a successful check of a node."""
+        nodes = self._last_ok[network]
+        if url not in nodes:
+            self._changed()
+        nodes[url] = at
+        self._next_expiry = min(self._next_expiry, at + LIVE_WINDOW)
+
+    def remove(self, network: Network, url: str) -> None:
+        """Drop a node, for example after it was deleted."""
+        if self._last_ok[network].pop(url, None) is not None:
+            self._changed()
+
+    def count(self, network: Network) -> int:
+        """Count of live nodes in a network."""
+        self._expire()
+        return len(self._last_ok[network])
+
+    def urls(self) -> dict[Network, list[str]]:
+        """Live node URLs grouped by network."""
+        self._expire()
+        return {network: sorted(nodes) for network, nodes in self._last_ok.items()}
+
+    def snapshot(self) -> LiveSnapshot:
+        """Return the current snapshot; re-rendered only if live nodes changed since the previous call."""
+        self._expire()
+        if self._snapshot is None or self._snapshot.version != self._version:
+            body = json.dumps({network.value: urls for network, urls in self.urls().items()}, separators=(",", ":")).encode()
+            etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            self._snapshot = LiveSnapshot(version=self._version, etag=etag, body=body)
+        return self._snapshot
+
+    def _changed(self) -> None:
+        self._version += 1
+
+    def _expire(self) -> None:
+        now = time.time()
+        if now < self._next_expiry:
+            return
+        deadline = now - LIVE_WINDOW
+        next_expiry = float("inf")
+        for nodes in self._last_ok.values():
+            for url, at in list(nodes.items()):
+                if at <= deadline:
+                    del nodes[url]
+                    self._changed()
+                else:
+                    next_expiry = min(next_expiry, at + LIVE_WINDOW)
+        self._next_expiry = next_expiry
@@ -0,0 +1,172 @@
+"""Minimal Prometheus-style metrics: counters, gauges and histograms rendered in the text exposition format.
+
+Recording is a dict lookup and an addition, cheap enough for the check hot path. Label values are positional.
+"""
+
+import abc
+import bisect
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric(abc.ABC):
+    """Base of all metric types."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Labels = ()) -> None:
+        """Create a metric, labels are the label names in the order values are passed."""
+        self.name = name
+        self.description = description
+        self.labels = labels
+
+    def _label_str(self, values: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, values, strict=True)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Sample lines of the metric."""
+
+    def render(self) -> str:
+        """HELP, TYPE and sample lines."""
+        return "\n".join([f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}", *self.samples()])
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Labels = ()) -> None:
+        """Create a metric without samples."""
+        super().__init__(name, description, labels)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        """Increase the counter of a label set."""
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def samples(self) -> Iterator[str]:
+        """Sample lines of the metric."""
+        for labels, value in self._values.items():
+            yield f"{self.name}{self._label_str(labels)} {value}"
+
+
+class Gauge(Metric):
+    """Value that can go up and down, set when it is collected."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels: Labels = ()) -> None:
+        """Create a metric without samples."""
+        super().__init__(name, description, labels)
+        self._values: dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the gauge of a label set."""
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[str]:
+        """Sample lines of the metric."""
+        for labels, value in self._values.items():
+            yield f"{self.name}{self._label_str(labels)} {value}"
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets, per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Create a metric without samples, buckets are the upper bounds without +Inf."""
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}  # labels -> (bucket counts + inf, [sum])
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value for a label set."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> Iterator[str]:
+        """Sample lines of the metric."""
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)}"'
+                yield f"{self.name}_bucket{self._label_str(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._label_str(labels)} {total[0]}"
+            yield f"{self.name}_count{self._label_str(labels)} {cumulative}"
+
+
+class Registry:
+    """Set of metrics rendered together."""
+
+    def __init__(self, *metrics: Metric) -> None:
+        """Create a registry rendering metrics in the given order."""
+        self._metrics = list(metrics)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+RPC_PHASE_SECONDS = Histogram(
+    "rpc_phase_seconds",
+    "RPC probe phase timings: dns, connect (new connections, includes tls and proxy), headers, read, parse",
+    ("network_type", "phase"),
+)
+CHECKS_TOTAL = Counter("checks_total", "Node checks by outcome", ("network_type", "status"))
+CHECK_SECONDS = Histogram("check_seconds", "Node check duration", ("network_type",))
+SCHEDULER_LAG_SECONDS = Histogram("scheduler_lag_seconds", "How overdue nodes are when their check starts", buckets=LAG_BUCKETS)
+CHECKS_IN_FLIGHT = Gauge("checks_in_flight", "Node checks running right now")
+CHECK_CONCURRENCY_LIMIT = Gauge("check_concurrency_limit", "Node checks allowed in flight")
+SCHEDULED_NODES = Gauge("scheduled_nodes", "Nodes tracked by the check scheduler")
+CHECK_WRITER_PENDING = Gauge("check_writer_pending", "Check results waiting for a bulk write")
+MONGO_OP_SECONDS = Histogram("mongo_op_seconds", "Mongo operation latency", ("collection", "op"))
+EVENT_SUBSCRIBERS = Gauge("event_subscribers", "Clients of the node event stream")
+EVENTS_DROPPED_TOTAL = Counter("events_dropped_total", "Events dropped for slow event stream clients")
+PROXY_POOL_SIZE = Gauge("proxy_pool_size", "Proxies in the pool")
+PROXY_POOL_QUARANTINED = Gauge("proxy_pool_quarantined", "Proxies in quarantine")
+
+REGISTRY = Registry(
+    RPC_PHASE_SECONDS,
+    CHECKS_TOTAL,
+    CHECK_SECONDS,
+    SCHEDULER_LAG_SECONDS,
+    CHECKS_IN_FLIGHT,
+    CHECK_CONCURRENCY_LIMIT,
+    SCHEDULED_NODES,
+    CHECK_WRITER_PENDING,
+    MONGO_OP_SECONDS,
+    EVENT_SUBSCRIBERS,
+    EVENTS_DROPPED_TOTAL,
+    PROXY_POOL_SIZE,
+    PROXY_POOL_QUARANTINED,
+)
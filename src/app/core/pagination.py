@@ -0,0 +1,72 @@
+"""Keyset pagination, field projection and NDJSON streaming over raw Mongo cursors."""
+
+import json
+from collections.abc import AsyncIterator, Mapping
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo.asynchronous.collection import AsyncCollection
+
+NDJSON_CHUNK = 100  # documents per streamed chunk
+
+
+class Page(BaseModel):
+    """One page of documents. Pass `next` as the cursor of the next request; None means this is the last page."""
+
+    items: list[dict[str, Any]]
+    next: str | None
+
+
+def projection(fields: str | None, model: type[BaseModel]) -> dict[str, int] | None:
+    """Build a projection from a comma-separated field list, None means all fields. Raises ValueError on unknown fields."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return {name: 1 for name in names if name != "id"}
+
+
+def to_json_doc(doc: Mapping[str, Any]) -> dict[str, Any]:
+    """Make a raw Mongo document JSON-ready: `_id` becomes `id`, ObjectId and datetime become strings."""
+    result: dict[str, Any] = {}
+    for key, value in doc.items():
+        if isinstance(value, ObjectId):
+            value = str(value)  # noqa: PLW2901
+        elif isinstance(value, datetime):
+            value = value.isoformat()  # noqa: PLW2901
+        result["id" if key == "_id" else key] = value
+    return result
+
+
+async def find_page(
+    collection: AsyncCollection[Any],
+    query: dict[str, Any],
+    cursor: ObjectId | None,
+    limit: int,
+    fields: dict[str, int] | None = None,
+    descending: bool = False,
+) -> Page:
+    """Find a page of documents ordered by _id, starting after the cursor. Uses the _id index, never skip()."""
+    if cursor is not None:
+        query = query | {"_id": {"$lt" if descending else "$gt": cursor}}
+    docs = await collection.find(query, fields, sort=[("_id", -1 if descending else 1)], limit=limit + 1).to_list()
+    next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    return Page(items=[to_json_doc(doc) for doc in docs[:limit]], next=next_cursor)
+
+
+async def stream_ndjson(
+    collection: AsyncCollection[Any], query: dict[str, Any], fields: dict[str, int] | None = None, descending: bool = False
+) -> AsyncIterator[bytes]:
+    """Yield documents as newline-delimited JSON straight from the cursor, a chunk of lines at a time."""
+    lines: list[str] = []
+    async for doc in collection.find(query, fields, sort=[("_id", -1 if descending else 1)], batch_size=NDJSON_CHUNK * 10):
+        lines.append(json.dumps(to_json_doc(doc), separators=(",", ":"), default=str))
+        if len(lines) >= NDJSON_CHUNK:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
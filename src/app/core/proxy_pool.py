@@ -0,0 +1,145 @@
+"""Proxy pool with health scoring, quarantine and sticky selection."""
+
+import random
+import time
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+EWMA_ALPHA = 0.1  # weight of the latest outcome in success rate and latency averages
+INITIAL_SUCCESS_RATE = 0.8  # optimistic start, so new proxies get traffic and a score
+INITIAL_LATENCY = 1.0  # seconds
+QUARANTINE_FAILURES = 5  # consecutive failures that put a proxy into quarantine
+QUARANTINE_TIME = 300  # seconds, doubled on every repeated quarantine
+MAX_QUARANTINE_TIME = 3600
+MIN_WEIGHT = 0.01
+
+
+class ProxyStats(BaseModel):
+    """Health stats of a proxy."""
+
+    proxy: str
+    successes: int
+    failures: int
+    success_rate: float  # moving average, 0..1
+    latency: float  # moving average of successful request time, seconds
+    score: float
+    quarantined: bool
+    quarantined_until: float | None  # unix time
+
+
+@dataclass(slots=True)
+class _Health:
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    success_rate: float = INITIAL_SUCCESS_RATE
+    latency: float = INITIAL_LATENCY
+    quarantines: int = 0
+    quarantined_until: float = 0.0
+
+    @property
+    def score(self) -> float:
+        return self.success_rate / (1 + self.latency)
+
+
+class ProxyPool:
+    """Selects proxies weighted by score and keeps quarantined proxies out of rotation until re-admission.
+
+    Score is the moving success rate divided by (1 + moving latency). With affinity, a key (node url or host)
+    keeps its proxy while that proxy is not quarantined, so its warm pooled connection is reused. Batch keys of the
+    scheduler are pinned the same way in a map of their own.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty pool, proxies are added by set_proxies."""
+        self._health: dict[str, _Health] = {}
+        self._affinity: dict[str, str] = {}  # key -> proxy
+        self._batch_affinity: dict[str, str] = {}  # batch key -> proxy
+
+    def __len__(self) -> int:
+        """Count of known proxies, quarantined included."""
+        return len(self._health)
+
+    @property
+    def proxies(self) -> list[str]:
+        """All proxies in the pool."""
+        return list(self._health)
+
+    @property
+    def quarantined(self) -> int:
+        """Count of proxies in quarantine right now."""
+        now = time.time()
+        return sum(1 for health in self._health.values() if health.quarantined_until > now)
+
+    def set_proxies(self, proxies: list[str]) -> None:
+        """Replace the proxy list, keeping the health of proxies that stay."""
+        self._health = {proxy: self._health.get(proxy) or _Health() for proxy in proxies}
+        self._affinity = {key: proxy for key, proxy in self._affinity.items() if proxy in self._health}
+        self._batch_affinity = {key: proxy for key, proxy in self._batch_affinity.items() if proxy in self._health}
+
+    def choose(self, key: str | None = None) -> str | None:
+        """Pick a proxy for a request, None if the pool is empty. If every proxy is quarantined, the best one is used."""
+        return self._choose(self._affinity, key)
+
+    def choose_for_batch(self, key: str) -> str | None:
+        """Pick the proxy of a batch key, the same one while it is not quarantined."""
+        return self._choose(self._batch_affinity, key)
+
+    def _choose(self, affinity: dict[str, str], key: str | None) -> str | None:
+        if not self._health:
+            return None
+        now = time.time()
+        if key is not None:
+            proxy = affinity.get(key)
+            if proxy is not None and self._health[proxy].quarantined_until <= now:
+                return proxy
+
+        candidates = [(proxy, health) for proxy, health in self._health.items() if health.quarantined_until <= now]
+        if candidates:
+            weights = [max(MIN_WEIGHT, health.score) for _, health in candidates]
+            proxy = random.choices([proxy for proxy, _ in candidates], weights=weights)[0]
+        else:
+            proxy = min(self._health, key=lambda p: self._health[p].quarantined_until)
+        if key is not None:
+            affinity[key] = proxy
+        return proxy
+
+    def record(self, proxy: str, ok: bool, elapsed: float) -> None:
+        """Record a request outcome through a proxy. ok means the proxy delivered a response, whatever the node said."""
+        health = self._health.get(proxy)
+        if health is None:
+            return
+        health.success_rate += EWMA_ALPHA * ((1.0 if ok else 0.0) - health.success_rate)
+        if ok:
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.quarantines = 0
+            health.latency += EWMA_ALPHA * (elapsed - health.latency)
+            return
+        health.failures += 1
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= QUARANTINE_FAILURES:
+            health.quarantined_until = time.time() + min(MAX_QUARANTINE_TIME, QUARANTINE_TIME * 2**health.quarantines)
+            health.quarantines += 1
+            health.consecutive_failures = QUARANTINE_FAILURES - 1  # one more failure after re-admission quarantines again
+            self._affinity = {key: p for key, p in self._affinity.items() if p != proxy}
+            self._batch_affinity = {key: p for key, p in self._batch_affinity.items() if p != proxy}
+
+    def stats(self) -> list[ProxyStats]:
+        """Health stats of all proxies, best first."""
+        now = time.time()
+        result = [
+            ProxyStats(
+                proxy=proxy,
+                successes=health.successes,
+                failures=health.failures,
+                success_rate=round(health.success_rate, 3),
+                latency=round(health.latency, 3),
+                score=round(health.score, 3),
+                quarantined=health.quarantined_until > now,
+                quarantined_until=health.quarantined_until or None,
+            )
+            for proxy, health in self._health.items()
+        ]
+        return sorted(result, key=lambda s: (s.quarantined, -s.score))
@@ -0,0 +1,90 @@
+"""Height-aware node ranking: lag from the network tip and rolling latency percentiles."""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from mm_web3 import Network
+from pydantic import BaseModel
+
+from app.core.live_index import LIVE_WINDOW
+
+LATENCY_SAMPLES = 50  # count of last successful check latencies kept per node
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted non-empty list, p in 0..100."""
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RankedNode(BaseModel):
+    """Node position in the ranking of its network."""
+
+    url: str
+    height: int
+    lag: int  # blocks behind the highest height seen in the network
+    p50: float  # median check latency, seconds
+    p95: float
+
+
+@dataclass(slots=True)
+class _NodeStats:
+    height: int
+    ok_at: float
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+
+class NodeRanking:
+    """Tracks height and latency of successfully checked nodes.
+
+    The network tip is the highest height reported by a node that was live within LIVE_WINDOW, so a node that
+    once reported a bogus height stops defining the tip once it goes stale.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty ranking, nodes are added as their checks are recorded."""
+        self._nodes: dict[Network, dict[str, _NodeStats]] = {network: {} for network in Network}
+
+    def record(self, network: Network, url: str, height: int, elapsed: float) -> None:
+        """Record a successful check."""
+        stats = self._nodes[network].get(url)
+        if stats is None:
+            stats = self._nodes[network][url] = _NodeStats(height=height, ok_at=0)
+        stats.height = height
+        stats.ok_at = time.time()
+        stats.latencies.append(elapsed)
+
+    def remove(self, network: Network, url: str) -> None:
+        """Forget a node."""
+        self._nodes[network].pop(url, None)
+
+    def tip(self, network: Network) -> int | None:
+        """Highest height among live nodes of a network."""
+        live = self._live(network)
+        return max((stats.height for stats in live.values()), default=None)
+
+    def best(self, network: Network, limit: int, max_lag: int | None = None) -> list[RankedNode]:
+        """Live nodes of a network ordered by lag from the tip, then by median latency."""
+        live = self._live(network)
+        if not live:
+            return []
+        tip = max(stats.height for stats in live.values())
+        result = []
+        for url, stats in live.items():
+            lag = tip - stats.height
+            if max_lag is not None and lag > max_lag:
+                continue
+            latencies = sorted(stats.latencies)
+            result.append(
+                RankedNode(url=url, height=stats.height, lag=lag, p50=percentile(latencies, 50), p95=percentile(latencies, 95))
+            )
+        result.sort(key=lambda node: (node.lag, node.p50, node.p95))
+        return result[:limit]
+
+    def _live(self, network: Network) -> dict[str, _NodeStats]:
+        deadline = time.time() - LIVE_WINDOW
+        nodes = self._nodes[network]
+        for url in [url for url, stats in nodes.items() if stats.ok_at <= deadline]:
+            del nodes[url]
+        return nodes
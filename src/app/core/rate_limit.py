@@ -0,0 +1,148 @@
+"""Per-provider-host token buckets for RPC checks."""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import UTC
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from mm_std import utc
+
+from app.core.types import AppCore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_AFTER = 30  # seconds a host is paused after a 429 without a usable Retry-After header
+MAX_RETRY_AFTER = 3600
+
+
+def parse_host_limits(text: str) -> dict[str, tuple[float, float]]:
+    """Parse `host rate [burst]` entries separated by commas or new lines into host -> (rate, burst).
+
+    `*` is the default for hosts without their own entry. Invalid entries are logged and skipped.
+    """
+    result: dict[str, tuple[float, float]] = {}
+    for entry in re.split(r"[,\n]", text):
+        parts = entry.split()
+        if not parts:
+            continue
+        try:
+            rate = float(parts[1]) if len(parts) > 1 else 0.0
+            burst = float(parts[2]) if len(parts) > 2 else max(1.0, rate)
+        except ValueError:
+            rate = burst = 0.0
+        if len(parts) > 3 or rate <= 0 or burst < 1:
+            logger.warning("invalid host rate limit", extra={"entry": entry.strip()})
+            continue
+        result[parts[0].lower()] = (rate, burst)
+    return result
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds from a Retry-After header, given as seconds or an HTTP date. None if missing or invalid."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except ValueError:
+            return None
+        if date.tzinfo is None:  # a -0000 zone, RFC 2822 reads it as UTC
+            date = date.replace(tzinfo=UTC)
+        seconds = (date - utc()).total_seconds()
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
+
+
+def url_host(url: str) -> str | None:
+    """Lowercase host of a URL, None if it has none."""
+    try:
+        return urlsplit(url).hostname
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class _TokenBucket:
+    rate: float  # tokens per second
+    burst: float
+    tokens: float
+    updated_at: float
+
+    def acquire(self, now: float) -> float:
+        """Take a token and return 0, or return seconds until one is available without taking it."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class HostRateLimiter:
+    """Token bucket per node URL host, limits come from the `host_rate_limits` setting.
+
+    An entry covers its host and all subdomains, the most specific entry wins, `*` is the default. Each host
+    has its own bucket, so subdomains of one entry do not share tokens. A 429 pauses the host for its
+    Retry-After, limited or not. Buckets live in the process: every check worker applies the limits on its own.
+    """
+
+    def __init__(self, core: AppCore) -> None:
+        """Create a limiter without buckets, limits are parsed on first use."""
+        self.core = core
+        self._text: str | None = None
+        self._limits: dict[str, tuple[float, float]] = {}
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._paused: dict[str, float] = {}  # host -> monotonic time the pause ends
+
+    def acquire(self, host: str | None) -> float:
+        """Take a token for one request to host and return 0, or return seconds to wait without taking it."""
+        if host is None:
+            return 0.0
+        now = time.monotonic()
+        paused_until = self._paused.get(host)
+        if paused_until is not None:
+            if paused_until > now:
+                return paused_until - now
+            del self._paused[host]
+        bucket = self._bucket(host, now)
+        return bucket.acquire(now) if bucket else 0.0
+
+    def interval(self, host: str | None) -> float:
+        """Seconds between requests to host at its sustained rate, 0 if unlimited."""
+        limit = self._limit(host) if host else None
+        return 1 / limit[0] if limit else 0.0
+
+    def pause(self, host: str | None, seconds: float | None) -> None:
+        """Send no requests to host for seconds, DEFAULT_RETRY_AFTER if unknown."""
+        if host is not None:
+            self._paused[host] = time.monotonic() + (seconds if seconds is not None else DEFAULT_RETRY_AFTER)
+
+    def _bucket(self, host: str, now: float) -> _TokenBucket | None:
+        limit = self._limit(host)
+        if limit is None:
+            return None
+        rate, burst = limit
+        bucket = self._buckets.get(host)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            bucket = self._buckets[host] = _TokenBucket(rate=rate, burst=burst, tokens=burst, updated_at=now)
+        return bucket
+
+    def _limit(self, host: str) -> tuple[float, float] | None:
+        text = self.core.settings.host_rate_limits
+        if text != self._text:
+            self._text = text
+            self._limits = parse_host_limits(text)
+            self._buckets.clear()
+        if not self._limits:
+            return None
+        name = host
+        while True:
+            if name in self._limits:
+                return self._limits[name]
+            if "." not in name:
+                return self._limits.get("*")
+            name = name.split(".", 1)[1]
@@ -0,0 +1,93 @@
+"""Per-node minute and hour check rollups, accumulated between flushes and upserted with one bulk write."""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from bson import ObjectId
+from mm_web3 import Network
+from pymongo import UpdateOne
+
+from app.core.check_scheduler import timestamp
+from app.core.db import Check, NodeStatus, RollupPeriod
+
+
+def bucket_start(at: datetime, period: RollupPeriod) -> datetime:
+    """Start of the bucket a time falls into."""
+    ts = timestamp(at)
+    return datetime.fromtimestamp(ts - ts % period.seconds, UTC)
+
+
+@dataclass(slots=True)
+class _Bucket:
+    network: Network
+    url: str
+    ok_count: int = 0
+    fail_count: int = 0
+    elapsed_sum: float = 0.0
+    elapsed_min: float | None = None
+    elapsed_max: float | None = None
+    height_min: int | None = None
+    height_max: int | None = None
+
+    def add(self, check: Check) -> None:
+        if check.status != NodeStatus.OK:
+            self.fail_count += 1
+            return
+        self.ok_count += 1
+        self.elapsed_sum += check.elapsed
+        self.elapsed_min = check.elapsed if self.elapsed_min is None else min(self.elapsed_min, check.elapsed)
+        self.elapsed_max = check.elapsed if self.elapsed_max is None else max(self.elapsed_max, check.elapsed)
+        if check.height is not None:
+            self.height_min = check.height if self.height_min is None else min(self.height_min, check.height)
+            self.height_max = check.height if self.height_max is None else max(self.height_max, check.height)
+
+
+class RollupBuffer:
+    """Merges checks into (node, period, bucket) stats; `take` turns them into $inc/$min/$max upserts.
+
+    A node checked every 30 seconds costs one upsert per minute bucket and per hour bucket per flush, however
+    many of its checks landed in the flush. Proxy failures and rate limited checks say nothing about the node and
+    are not counted.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty buffer."""
+        self._buckets: dict[tuple[ObjectId, RollupPeriod, datetime], _Bucket] = {}
+
+    def __len__(self) -> int:
+        """Count of buffered buckets."""
+        return len(self._buckets)
+
+    def add(self, node_id: ObjectId, check: Check) -> None:
+        """Count a check in its minute and hour buckets."""
+        if check.status in (NodeStatus.PROXY, NodeStatus.RATE_LIMITED):
+            return
+        for period in RollupPeriod:
+            key = (node_id, period, bucket_start(check.created_at, period))
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(network=check.network, url=check.url)
+            bucket.add(check)
+
+    def take(self) -> list[UpdateOne]:
+        """Upserts of all buffered buckets; the buffer is emptied."""
+        buckets, self._buckets = self._buckets, {}
+        return [_upsert(key, bucket) for key, bucket in buckets.items()]
+
+
+def _upsert(key: tuple[ObjectId, RollupPeriod, datetime], bucket: _Bucket) -> UpdateOne:
+    node_id, period, start = key
+    update: dict[str, dict[str, object]] = {
+        "$setOnInsert": {
+            "network": bucket.network,
+            "url": bucket.url,
+            "expire_at": start + timedelta(seconds=period.retention),
+        },
+        "$inc": {"ok_count": bucket.ok_count, "fail_count": bucket.fail_count, "elapsed_sum": bucket.elapsed_sum},
+    }
+    mins = {"elapsed_min": bucket.elapsed_min, "height_min": bucket.height_min}
+    maxs = {"elapsed_max": bucket.elapsed_max, "height_max": bucket.height_max}
+    if bucket.ok_count:
+        update["$min"] = {field: value for field, value in mins.items() if value is not None}
+        update["$max"] = {field: value for field, value in maxs.items() if value is not None}
+    return UpdateOne({"node_id": node_id, "period": period, "bucket": start}, update, upsert=True)
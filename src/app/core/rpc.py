@@ -1,79 +1,96 @@
 """RPC functions to fetch block height from different blockchain networks."""
 
 import logging
+from collections.abc import Callable
+from typing import Any
 
-import pydash
-from mm_http import http_request
 from mm_result import Result
 
+from app.core.http_pool import HttpPool, HttpResponse, UnknownResponseError
+
 logger = logging.getLogger(__name__)
 
+RATE_LIMIT_CODES = frozenset({429, -32005})  # JSON-RPC error codes of providers that throttle with a 200 response
+
+
+def _hex_int(value: Any) -> int:  # noqa: ANN401 - raw JSON value
+    return int(value, 16)
+
 
-async def get_evm_height(url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
+def _extract_height(res: HttpResponse, field: str, convert: Callable[[Any], int]) -> Result[int]:
+    """Read one top-level field of the JSON body.
+
+    A JSON-RPC `error` object becomes a service_error, or rate_limited for a throttling code; a body that is not JSON,
+    or lacks the field, unknown_response.
+    """
+    try:
+        doc = res.json_object()
+    except UnknownResponseError as e:
+        return res.to_result_unknown(e)
+    error = doc.get("error")
+    if isinstance(error, dict) and error.get("code") in RATE_LIMIT_CODES:
+        return res.to_result_err("rate_limited")
+    if error:
+        return res.to_result_err(f"service_error: {error.get('message') if isinstance(error, dict) else error}")
+    try:
+        return res.to_result_ok(convert(doc[field]))
+    except (KeyError, TypeError, ValueError) as e:
+        return res.to_result_unknown(e)
+
+
+async def get_evm_height(pool: HttpPool, url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
     """Fetch current block height from an EVM-compatible node."""
-    res = await http_request(
-        url=url,
+    res = await pool.request(
+        url,
         method="post",
         json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": "1"},
         proxy=proxy,
         timeout=timeout,
+        label="evm",
     )
     if res.is_err():
         return res.to_result_err()
-    try:
-        return res.to_result_ok(int(res.json_body("result").unwrap(), 16))
-    except Exception as e:
-        return res.to_result_err(e)
+    return _extract_height(res, "result", _hex_int)
 
 
-async def get_starknet_height(url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
+async def get_starknet_height(pool: HttpPool, url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
     """Fetch current block height from a Starknet node."""
-    res = await http_request(
-        url=url,
+    res = await pool.request(
+        url,
         method="post",
         json={"jsonrpc": "2.0", "method": "starknet_blockNumber", "params": [], "id": "1"},
         proxy=proxy,
         timeout=timeout,
+        label="starknet",
     )
     if res.is_err():
         return res.to_result_err()
-    try:
-        return res.to_result_ok(res.json_body("result").unwrap())
-    except Exception as e:
-        return res.to_result_err(e)
+    return _extract_height(res, "result", int)
 
 
-async def get_solana_height(url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
+async def get_solana_height(pool: HttpPool, url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
     """Fetch current block height from a Solana node."""
-    res = await http_request(
-        url=url,
+    res = await pool.request(
+        url,
         method="post",
         json={"jsonrpc": "2.0", "method": "getBlockHeight", "params": [], "id": "1"},
         proxy=proxy,
         timeout=timeout,
+        label="solana",
     )
     if res.is_err():
         return res.to_result_err()
-    json_body = res.json_body().unwrap_or(None)
-    err = pydash.get(json_body, "error.message")
-    if err:
-        return res.to_result_err(f"service_error: {err}")
-    try:
-        return res.to_result_ok(int(json_body["result"]))
-    except Exception as e:
-        return res.to_result_err(e)
+    return _extract_height(res, "result", int)
 
 
-async def get_aptos_height(url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
+async def get_aptos_height(pool: HttpPool, url: str, proxy: str | None = None, timeout: float = 5) -> Result[int]:
     """Fetch current block height from an Aptos node."""
-    res = await http_request(
-        url=url,
+    res = await pool.request(
+        url,
         proxy=proxy,
         timeout=timeout,
+        label="aptos",
     )
     if res.is_err():
         return res.to_result_err()
-    try:
-        return res.to_result_ok(int(res.json_body("block_height").unwrap()))
-    except Exception as e:
-        return res.to_result_err(e)
+    return _extract_height(res, "block_height", int)
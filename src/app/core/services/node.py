@@ -1,170 +1,593 @@
 """Node management service: CRUD operations and health checks."""
 
+import codecs
+import enum
+import hashlib
+import json
 import logging
+import random
 import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cached_property
 from typing import cast
+from urllib.parse import urlsplit
 
-import anyio
 import pydash
 import tomlkit
 from bson import ObjectId
 from mm_base6 import Service
 from mm_base6.core.utils import toml_dumps, toml_loads
-from mm_concurrency import async_mutex
+from mm_mongo import MongoDeleteResult
 from mm_result import Result
 from mm_std import utc
-from mm_web3 import Network, NetworkType, random_proxy
+from mm_web3 import Network, NetworkType
 from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
 
-from app.core import rpc
-from app.core.db import Check, Node, NodeStatus
+from app.core import metrics, rpc
+from app.core.check_flights import CheckFlights, CheckOutcome
+from app.core.check_scheduler import SYNC_INTERVAL, CheckScheduler, jittered, next_check_interval, timestamp
+from app.core.check_writer import FLUSH_INTERVAL, CheckWriter
+from app.core.concurrency import AdaptiveConcurrency
+from app.core.db import Check, Node, NodeStatus, RollupPeriod
+from app.core.events import EventBus, encode
+from app.core.http_pool import PROBE_ERRORS, HttpPool
+from app.core.live_index import LIVE_WINDOW, LiveIndex, LiveSnapshot
+from app.core.ranking import NodeRanking, RankedNode
+from app.core.rate_limit import HostRateLimiter, url_host
+from app.core.rollups import bucket_start
 from app.core.types import AppCore
 
 logger = logging.getLogger(__name__)
 
+INGEST_CHUNK = 1000  # URLs per existence query and insert_many
+DUPLICATE_KEY_ERROR = 11000
+
+# with check workers, ok checks are pulled from Mongo once they settle: the delay covers the write-behind flush
+CHECKED_SYNC_DELAY = 2 * FLUSH_INTERVAL
+
+NETWORKS_INFO_TTL = 5  # seconds, dashboards refreshing faster get the cached summary
+DOWN_STATUSES = [status.value for status in NodeStatus if status not in (NodeStatus.OK, NodeStatus.NOT_CHECKED)]
+
 
 class NetworkInfo(BaseModel):
     """Summary info for a single network."""
 
     network: Network
-    all_nodes: int
-    live_nodes: int
+    all_nodes: int = 0
+    live_nodes: int = 0  # responded successfully within LIVE_WINDOW
+    ok_nodes: int = 0  # last check ok
+    down_nodes: int = 0  # last check failed
+    max_height: int | None = None
+    avg_elapsed: float | None = None  # average last check time of ok nodes, seconds
+
+
+@enum.unique
+class ExportFormat(enum.StrEnum):
+    """Format of the node export."""
+
+    TOML = "toml"  # the import_from_toml format
+    JSON = "json"  # {network: [url, ...]}
+
+
+@dataclass(frozen=True, slots=True)
+class NodeExport:
+    """Rendered node export of one node set version."""
+
+    version: int
+    etag: str
+    body: bytes
+    media_type: str
+
+
+class IngestResult(BaseModel):
+    """Counts of a bulk node ingest."""
+
+    added: int = 0
+    duplicates: int = 0  # already stored or repeated in the input
+    invalid: int = 0  # not an http(s) URL
+
+    def merge(self, other: IngestResult) -> None:
+        """Add counts of another ingest."""
+        self.added += other.added
+        self.duplicates += other.duplicates
+        self.invalid += other.invalid
+
+    def __str__(self) -> str:
+        """Summary for the UI flash message."""
+        return f"added: {self.added}, duplicates: {self.duplicates}, invalid: {self.invalid}"
+
+
+class UptimeBucket(BaseModel):
+    """Check stats of one rollup bucket."""
+
+    bucket: datetime
+    ok_count: int
+    fail_count: int
+    elapsed_avg: float | None
+    elapsed_max: float | None
+    height_max: int | None
+
+
+class Uptime(BaseModel):
+    """Uptime and latency of a node over a time range, read from check rollups only."""
+
+    period: RollupPeriod
+    since: datetime
+    ok_count: int = 0
+    fail_count: int = 0
+    uptime: float | None = None  # share of ok checks, 0..1
+    elapsed_avg: float | None = None  # of ok checks, seconds
+    elapsed_min: float | None = None
+    elapsed_max: float | None = None
+    height_delta: int | None = None  # blocks the node advanced in the range
+    buckets: list[UptimeBucket] = []
+
+
+def normalize_url(url: str) -> str | None:
+    """Strip whitespace and the trailing slash, None if it is not an http(s) URL with a host."""
+    url = url.strip().removesuffix("/")
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return url
 
 
 class NodeService(Service[AppCore]):
     """Service for node management and health checks."""
 
+    _networks_info_cache: tuple[float, list[NetworkInfo]] = (0.0, [])  # (monotonic time, info)
+    _node_set_version = 0  # bumped when nodes are added or deleted, invalidates cached exports
+    _checked_synced_until: datetime | None = None  # ok checks up to this time are in the live index and the ranking
+
     def configure_scheduler(self) -> None:
-        """Schedule periodic node checks."""
-        self.core.scheduler.add("check_next_node", 3, self.core.services.node.check_next)
+        """Run the continuous check scheduler, it is restarted if it ever exits."""
+        self.core.scheduler.add("check_scheduler", 1, self.check_scheduler.run)
+        self.core.scheduler.add("evict_idle_http_sessions", 60, self.http_pool.evict_idle)
+        self.core.scheduler.add("flush_checks", FLUSH_INTERVAL, self.check_writer.flush)
+        self.core.scheduler.add("sync_checked_nodes", SYNC_INTERVAL, self.sync_checked_nodes)
+        self.core.scheduler.add("publish_live_counts", SYNC_INTERVAL, self.publish_live_counts)
 
-    async def export_as_toml(self) -> str:
-        """Export all nodes as TOML configuration."""
-        nodes = []
-        for network in Network:
-            urls = await self.core.db.node.collection.distinct("url", {"network": network})
-            if urls:
-                nodes.append(
-                    {
-                        "network": network.value,
-                        "urls": tomlkit.string("\n".join(urls), multiline=True),
-                    }
-                )
+    async def on_stop(self) -> None:
+        """Cancel running checks, flush buffered check results and close pooled HTTP sessions."""
+        await self.check_flights.cancel()
+        await self.check_writer.flush()
+        await self.http_pool.close()
+
+    @cached_property
+    def check_scheduler(self) -> CheckScheduler:
+        """Scheduler that keeps checking due nodes."""
+        return CheckScheduler(self.core)
+
+    @cached_property
+    def check_workers(self) -> int:
+        """The check_workers setting as of start: app.main starts the worker processes once, so a change needs a restart."""
+        return self.core.settings.check_workers
+
+    @cached_property
+    def concurrency(self) -> AdaptiveConcurrency:
+        """Limit of concurrent checks, tuned by load when adaptive_concurrency is on."""
+        return AdaptiveConcurrency(self.core)
+
+    @cached_property
+    def rate_limits(self) -> HostRateLimiter:
+        """Per-host check rate limits from the host_rate_limits setting."""
+        return HostRateLimiter(self.core)
+
+    @cached_property
+    def check_flights(self) -> CheckFlights:
+        """Running check per node and recent results, shared with on-demand callers."""
+        return CheckFlights()
+
+    @cached_property
+    def http_pool(self) -> HttpPool:
+        """Keep-alive HTTP sessions shared by all RPC probes."""
+        return HttpPool(limit_per_host=self.core.settings.http_connections_per_host)
+
+    @cached_property
+    def live_index(self) -> LiveIndex:
+        """In-memory index of live nodes, use get_live_index to get it loaded."""
+        return LiveIndex()
+
+    @cached_property
+    def ranking(self) -> NodeRanking:
+        """Height and latency stats of successfully checked nodes."""
+        return NodeRanking()
+
+    @cached_property
+    def events(self) -> EventBus:
+        """Node status, height and live count events for the SSE stream."""
+        return EventBus()
 
-        return toml_dumps({"nodes": nodes})
+    @cached_property
+    def _published_live_counts(self) -> dict[Network, int]:
+        return {}
 
-    async def import_from_toml(self, toml: str) -> int:
-        """Import nodes from TOML configuration, returns count of new nodes added."""
-        result = 0
+    @cached_property
+    def _export_cache(self) -> dict[tuple[ExportFormat, Network | None], NodeExport]:
+        return {}
+
+    @cached_property
+    def check_writer(self) -> CheckWriter:
+        """Write-behind buffer for check results."""
+        return CheckWriter(self.core)
+
+    async def export_nodes(self, fmt: ExportFormat = ExportFormat.TOML, network: Network | None = None) -> NodeExport:
+        """Export node URLs of all networks or one network. Rendered once per node set version and format, then cached."""
+        key = (fmt, network)
+        cached = self._export_cache.get(key)
+        version = self._node_set_version
+        if cached is not None and cached.version == version:
+            return cached
+
+        urls: dict[Network, list[str]] = {}
+        query = {"network": network} if network else {}
+        async for doc in self.core.db.node.collection.find(query, {"network": 1, "url": 1, "_id": 0}, sort=[("url", 1)]):
+            urls.setdefault(Network(doc["network"]), []).append(doc["url"])
+        urls = {n: urls[n] for n in Network if n in urls}
+
+        if fmt == ExportFormat.JSON:
+            body = json.dumps({n.value: network_urls for n, network_urls in urls.items()}, separators=(",", ":")).encode()
+            media_type = "application/json"
+        else:
+            nodes = [
+                {"network": n.value, "urls": tomlkit.string("\n".join(network_urls), multiline=True)}
+                for n, network_urls in urls.items()
+            ]
+            body = toml_dumps({"nodes": nodes}).encode()
+            media_type = "text/plain; charset=utf-8"
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        export = NodeExport(version=version, etag=etag, body=body, media_type=media_type)
+        self._export_cache[key] = export
+        return export
+
+    async def import_from_toml(self, toml: str) -> IngestResult:
+        """Import nodes from TOML configuration."""
+        result = IngestResult()
         data = cast(dict[str, list[dict[str, str]]], toml_loads(toml))  # tomlkit returns dict-like TOMLDocument
         for node in data["nodes"]:
-            network = Network(node["network"])
-            urls = node["urls"].strip().splitlines()
-            urls = [url.strip().removesuffix("/") for url in urls if url.strip()]
-            urls = pydash.uniq(urls)
-            for url in urls:
-                if await self.core.db.node.exists({"url": url}):
-                    continue
-                await self.core.db.node.insert_one(Node(id=ObjectId(), network=network, url=url))
-                result += 1
+            result.merge(await self.ingest(Network(node["network"]), node["urls"].splitlines()))
+        return result
+
+    async def add(self, network: Network, urls_multiline: str) -> IngestResult:
+        """Add nodes from multiline URL string."""
+        return await self.ingest(network, urls_multiline.splitlines())
 
+    async def add_stream(self, network: Network, chunks: AsyncIterator[bytes]) -> IngestResult:
+        """Add nodes from a stream of newline-delimited URLs, ingesting INGEST_CHUNK lines at a time."""
+        result = IngestResult()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        lines: list[str] = []
+        tail = ""
+        async for chunk in chunks:
+            *complete, tail = (tail + decoder.decode(chunk)).split("\n")
+            lines.extend(complete)
+            if len(lines) >= INGEST_CHUNK:
+                result.merge(await self.ingest(network, lines))
+                lines = []
+        lines.append(tail)
+        result.merge(await self.ingest(network, lines))
         return result
 
-    @async_mutex
-    async def add(self, network: Network, urls_multiline: str) -> int:
-        """Add nodes from multiline URL string, returns count of new nodes added."""
-        result = 0
-        urls = [url.strip().removesuffix("/") for url in urls_multiline.splitlines() if url.strip()]
-        urls = pydash.uniq(urls)
-        for url in urls:
-            if await self.core.db.node.exists({"url": url}):
+    async def ingest(self, network: Network, urls: list[str]) -> IngestResult:
+        """Normalize URLs and insert the new ones in bulk.
+
+        Existing URLs are found with one $in query per INGEST_CHUNK URLs; new ones are inserted with an unordered
+        insert_many. A concurrent insert of the same URL is caught by the unique url index and counted as duplicate.
+        """
+        result = IngestResult()
+        normalized = []
+        for line in urls:
+            if not line.strip():
                 continue
-            await self.core.db.node.insert_one(Node(id=ObjectId(), network=network, url=url))
-            result += 1
+            url = normalize_url(line)
+            if url is None:
+                result.invalid += 1
+            else:
+                normalized.append(url)
+        unique = pydash.uniq(normalized)
+        result.duplicates += len(normalized) - len(unique)
 
+        for chunk in pydash.chunk(unique, INGEST_CHUNK):
+            existing = set(await self.core.db.node.collection.distinct("url", {"url": {"$in": chunk}}))
+            new_urls = [url for url in chunk if url not in existing]
+            result.duplicates += len(chunk) - len(new_urls)
+            if new_urls:
+                added = await self._insert_nodes(network, new_urls)
+                result.added += added
+                result.duplicates += len(new_urls) - added
         return result
 
-    async def check(self, id: ObjectId) -> Result[int]:
-        """Check a single node's health and update its status."""
-        node = await self.core.db.node.get(id)
+    async def _insert_nodes(self, network: Network, urls: list[str]) -> int:
+        """Insert nodes, returns count of inserted. Duplicate key errors are expected, other write errors are raised."""
+        try:
+            await self.core.db.node.insert_many([Node(id=ObjectId(), network=network, url=url) for url in urls], ordered=False)
+        except BulkWriteError as e:
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+            inserted = int(e.details.get("nInserted", 0))
+        else:
+            inserted = len(urls)
+        if inserted:
+            self._node_set_version += 1
+        return inserted
+
+    async def check(self, id: ObjectId, proxy: str | None = None) -> Result[int]:
+        """Check a single node's health and update its status. A proxy is picked from the proxy pool unless one is given."""
+        with metrics.MONGO_OP_SECONDS.time("node", "get"):
+            node = await self.core.db.node.get(id)
+        return await self.check_node(node, proxy)
+
+    async def request_check(self, id: ObjectId, force: bool = False) -> CheckOutcome:
+        """Check a node on demand: serve a result younger than check_result_max_age or join a running check of the node.
+
+        force skips the cached result, a running check is still joined.
+        """
+        if not force:
+            recent = self.check_flights.recent(id, self.core.settings.check_result_max_age)
+            if recent is not None:
+                return recent
+        with metrics.MONGO_OP_SECONDS.time("node", "get"):
+            node = await self.core.db.node.get(id)
+        return await self.check_flights.run(id, lambda: self._check_node(node, None), self.core.settings.check_result_max_age)
+
+    async def check_node(self, node: Node, proxy: str | None = None) -> Result[int]:
+        """Check an already loaded node, or wait for the check of it that is already running. The update clears its lease."""
+        outcome = await self.check_flights.run(
+            node.id, lambda: self._check_node(node, proxy), self.core.settings.check_result_max_age
+        )
+        return outcome.result
+
+    async def _check_node(self, node: Node, proxy: str | None) -> Result[int]:
+        id = node.id
         logger.info("check", extra={"url": node.url, "network": node.network.value})
 
-        proxy = random_proxy(self.core.state.proxies)
+        proxy = proxy or self.core.services.proxy.choose(node.url)
 
         start_time = time.perf_counter()
-        match node.network.network_type:
-            case NetworkType.EVM:
-                res = await rpc.get_evm_height(node.url, proxy=proxy)
-            case NetworkType.SOLANA:
-                res = await rpc.get_solana_height(node.url, proxy=proxy)
-            case NetworkType.APTOS:
-                res = await rpc.get_aptos_height(node.url, proxy=proxy)
-            case NetworkType.STARKNET:
-                res = await rpc.get_starknet_height(node.url, proxy=proxy)
-            case _:
-                raise NotImplementedError
+        res = await self._fetch_height(node, proxy)
+        elapsed = round(time.perf_counter() - start_time, 2)
 
-        updated: dict[str, object] = {"checked_at": utc()}
+        updated: dict[str, object] = {"checked_at": utc(), "elapsed": elapsed, "lease_owner": None, "lease_until": None}
+        lag = None
 
         if res.is_ok():
             status = NodeStatus.OK
             updated["height"] = res.unwrap()
-            updated["check_history"] = ([True, *node.check_history])[:100]
             updated["last_ok_at"] = utc()
+            self.live_index.mark_ok(node.network, node.url, time.time())
+            self.ranking.record(node.network, node.url, res.unwrap(), elapsed)
+            tip = self.ranking.tip(node.network)
+            lag = tip - res.unwrap() if tip is not None else None
 
         else:
             status = NodeStatus.from_error(res.unwrap_err())
             updated["height"] = None
-            updated["check_history"] = ([False, *node.check_history])[:100]
-
-        await self.core.db.check.insert_one(
-            Check(
-                id=ObjectId(),
-                network=node.network,
-                url=node.url,
-                proxy=proxy,
-                response=res.to_dict(safe_exception=True),
-                status=status,
-                elapsed=round(time.perf_counter() - start_time, 2),
-            )
+        if not (res.is_err() and res.unwrap_err() in PROBE_ERRORS):  # the pre-probe never goes through the proxy
+            self.core.services.proxy.record(proxy, status, elapsed, node_was_ok=node.history[:1] == "1")
+        network_type = node.network.network_type.value
+        metrics.CHECKS_TOTAL.inc(network_type, status.value)
+        metrics.CHECK_SECONDS.observe(elapsed, network_type)
+        self.concurrency.record(status, elapsed)
+        if status == NodeStatus.RATE_LIMITED:
+            await self._record_rate_limited(node, proxy, res, elapsed)
+            return res
+        self._publish_check_events(node, status, res.unwrap() if res.is_ok() else None)
+
+        check = Check(
+            id=ObjectId(),
+            network=node.network,
+            url=node.url,
+            proxy=proxy,
+            response=res.to_dict(safe_exception=True) if self._keep_response(status) else {},
+            status=status,
+            elapsed=elapsed,
+            height=res.unwrap() if res.is_ok() else None,
         )
-        await self.core.db.node.set(id, updated | {"status": status})
+        interval = self._next_check_interval(node, status, lag)
+        updated["next_check_at"] = utc() + timedelta(seconds=interval)
+        self.check_scheduler.schedule(id, time.time() + interval)
+
+        ok = None if status == NodeStatus.PROXY else status == NodeStatus.OK
+        await self.check_writer.add(check, id, Node.check_update(ok, updated | {"status": status}))
 
         return res
 
-    @async_mutex
-    async def check_next(self) -> None:
-        """Check the next batch of nodes that need checking."""
-        if not self.core.settings.auto_check:
-            return
-        logger.debug("check_next")
-        limit = self.core.settings.limit_concurrent_checks
-        nodes = await self.core.db.node.find({"checked_at": None}, limit=limit)
-        if len(nodes) < limit:
-            nodes += await self.core.db.node.find(
-                {"checked_at": {"$lt": utc(minutes=-1)}}, "checked_at", limit=limit - len(nodes)
-            )
-
-        async with anyio.create_task_group() as tg:
-            for node in nodes:
-                tg.start_soon(self.check, node.id, name=f"check_node_{node.id}")
-
-    @async_mutex
-    async def get_live_nodes(self) -> dict[Network, list[Node]]:
-        """Get nodes that responded successfully in the last 5 minutes."""
-        result: dict[Network, list[Node]] = {}
+    async def _record_rate_limited(self, node: Node, proxy: str | None, res: Result[int], elapsed: float) -> None:
+        """Pause the provider host for its Retry-After and retry the node no sooner. Status, history and height stay."""
+        retry_after = (res.extra or {}).get("retry_after")
+        self.rate_limits.pause(url_host(node.url), retry_after)
+        settings = self.core.settings
+        interval = jittered(max(retry_after or 0, settings.check_interval), settings.check_interval_max)
+        check = Check(
+            id=ObjectId(),
+            network=node.network,
+            url=node.url,
+            proxy=proxy,
+            response=res.to_dict(safe_exception=True),
+            status=NodeStatus.RATE_LIMITED,
+            elapsed=elapsed,
+        )
+        self.check_scheduler.schedule(node.id, time.time() + interval)
+        updated = {"checked_at": utc(), "next_check_at": utc(seconds=interval), "lease_owner": None, "lease_until": None}
+        await self.check_writer.add(check, node.id, {"$set": updated})
+
+    def _publish_check_events(self, node: Node, status: NodeStatus, height: int | None) -> None:
+        """Publish up/down transitions, height changes and a changed live count of the node's network."""
+        if self.events:
+            came_up = status == NodeStatus.OK and node.status != NodeStatus.OK
+            went_down = status != NodeStatus.OK and node.status == NodeStatus.OK
+            if came_up or went_down:
+                data = {"id": str(node.id), "url": node.url, "status": status.value, "previous": node.status.value}
+                self.events.publish("status", node.network, data)
+            if height is not None and height != node.height:
+                self.events.publish("height", node.network, {"id": str(node.id), "url": node.url, "height": height})
+        self._publish_live_count(node.network)
+
+    def _publish_live_count(self, network: Network) -> None:
+        # tracked without subscribers too: a new stream starts from the current count, so a stale entry would hide the next change
+        live = self.live_index.count(network)
+        if self._published_live_counts.get(network) != live:
+            self._published_live_counts[network] = live
+            self.events.publish("live_count", network, {"live": live})
+
+    async def stream_events(self, network: Network | None = None) -> AsyncIterator[bytes]:
+        """SSE stream of node events, starting with the current live count of each subscribed network."""
+        live_index = await self.get_live_index()
+        networks = [network] if network else list(Network)
+        initial = [encode("live_count", {"network": n.value, "live": live_index.count(n)}) for n in networks]
+        return self.events.stream(network, initial)
+
+    async def publish_live_counts(self) -> None:
+        """Publish live counts that changed, including nodes that dropped out of the live window without a check."""
         for network in Network:
-            result[network] = await self.core.db.node.find({"network": network, "last_ok_at": {"$gt": utc(minutes=-5)}})
+            self._publish_live_count(network)
+
+    async def _fetch_height(self, node: Node, proxy: str | None) -> Result[int]:
+        """Run the pre-probe if enabled, then the RPC request of the node's network type."""
+        if self.core.settings.check_preprobe:
+            reason = await self.http_pool.probe(node.url, proxy)
+            if reason is not None:
+                return Result.err(reason)
+        match node.network.network_type:
+            case NetworkType.EVM:
+                return await rpc.get_evm_height(self.http_pool, node.url, proxy=proxy)
+            case NetworkType.SOLANA:
+                return await rpc.get_solana_height(self.http_pool, node.url, proxy=proxy)
+            case NetworkType.APTOS:
+                return await rpc.get_aptos_height(self.http_pool, node.url, proxy=proxy)
+            case NetworkType.STARKNET:
+                return await rpc.get_starknet_height(self.http_pool, node.url, proxy=proxy)
+            case _:
+                raise NotImplementedError
+
+    def _keep_response(self, status: NodeStatus) -> bool:
+        """Raw responses are stored for failures and a sample of ok checks, rollups keep the stats of the rest."""
+        return status != NodeStatus.OK or random.random() < self.core.settings.check_response_sample
+
+    def _next_check_interval(self, node: Node, status: NodeStatus, lag: int | None) -> float:
+        """Seconds until the next check: back off on consecutive failures, tighten near the tip, add jitter.
+
+        A proxy failure says nothing about the node, so it neither starts nor extends a backoff and is not in history.
+        """
+        settings = self.core.settings
+        failures = 0 if status in (NodeStatus.OK, NodeStatus.PROXY) else 1 + len(node.history) - len(node.history.lstrip("0"))
+        interval = next_check_interval(
+            failures, lag, settings.check_interval, settings.check_interval_min, settings.check_interval_max
+        )
+        return jittered(interval, settings.check_interval_max)
+
+    async def delete(self, id: ObjectId) -> MongoDeleteResult:
+        """Delete a node and drop it from the scheduler and the live index."""
+        node = await self.core.db.node.get(id)
+        self.check_scheduler.discard(id)
+        self.check_flights.forget(id)
+        self.live_index.remove(node.network, node.url)
+        self.ranking.remove(node.network, node.url)
+        result = await self.core.db.node.delete(id)
+        self._node_set_version += 1  # after the delete, so an export in between is not cached under the new version
+        return result
+
+    async def get_live_index(self) -> LiveIndex:
+        """Get the live node index, it is loaded from the node collection on first use."""
+        if not self.live_index.loaded:
+            query = {"last_ok_at": {"$gt": utc(seconds=-LIVE_WINDOW)}}
+            async for doc in self.core.db.node.collection.find(query, {"network": 1, "url": 1, "last_ok_at": 1}):
+                self.live_index.mark_ok(Network(doc["network"]), doc["url"], timestamp(doc["last_ok_at"]))
+            self.live_index.loaded = True
+        return self.live_index
+
+    async def sync_checked_nodes(self) -> None:
+        """With check workers, feed ok checks they wrote into the live index and the ranking of this process."""
+        if self.check_workers == 0:
+            return
+        since = self._checked_synced_until or utc(seconds=-LIVE_WINDOW)
+        until = utc(seconds=-CHECKED_SYNC_DELAY)
+        query = {"last_ok_at": {"$gt": since, "$lte": until}}
+        projection = {"network": 1, "url": 1, "height": 1, "elapsed": 1, "last_ok_at": 1}
+        async for doc in self.core.db.node.collection.find(query, projection):
+            network = Network(doc["network"])
+            self.live_index.mark_ok(network, doc["url"], timestamp(doc["last_ok_at"]))
+            if doc.get("height") is not None:
+                self.ranking.record(network, doc["url"], doc["height"], doc.get("elapsed") or 0.0)
+        self._checked_synced_until = until
+
+    async def get_live_snapshot(self) -> LiveSnapshot:
+        """Get live node URLs grouped by network as a prerendered JSON snapshot."""
+        return (await self.get_live_index()).snapshot()
+
+    def get_best_nodes(
+        self, limit: int, max_lag: int | None = None, network: Network | None = None
+    ) -> dict[Network, list[RankedNode]]:
+        """Get the top live nodes per network, ranked by lag from the network tip and then by latency."""
+        networks = [network] if network else list(Network)
+        return {network: self.ranking.best(network, limit, max_lag) for network in networks}
+
+    def collect_metrics(self) -> None:
+        """Update the check path gauges before a metrics scrape."""
+        metrics.CHECKS_IN_FLIGHT.set(self.check_scheduler.in_flight)
+        metrics.CHECK_CONCURRENCY_LIMIT.set(self.concurrency.limit)
+        metrics.SCHEDULED_NODES.set(self.check_scheduler.size)
+        metrics.CHECK_WRITER_PENDING.set(self.check_writer.pending)
+        metrics.EVENT_SUBSCRIBERS.set(len(self.events))
+
+    async def get_uptime(self, id: ObjectId, period: RollupPeriod, hours: int) -> Uptime:
+        """Get uptime and latency of a node over the last hours from its minute or hour rollups."""
+        since = bucket_start(utc(hours=-hours), period)
+        rollups = await self.core.db.check_rollup.find({"node_id": id, "period": period, "bucket": {"$gte": since}}, "bucket")
+        result = Uptime(
+            period=period,
+            since=since,
+            ok_count=sum(r.ok_count for r in rollups),
+            fail_count=sum(r.fail_count for r in rollups),
+            buckets=[
+                UptimeBucket(
+                    bucket=r.bucket,
+                    ok_count=r.ok_count,
+                    fail_count=r.fail_count,
+                    elapsed_avg=round(r.elapsed_sum / r.ok_count, 3) if r.ok_count else None,
+                    elapsed_max=r.elapsed_max,
+                    height_max=r.height_max,
+                )
+                for r in rollups
+            ],
+        )
+        if result.ok_count + result.fail_count:
+            result.uptime = round(result.ok_count / (result.ok_count + result.fail_count), 4)
+        if result.ok_count:
+            result.elapsed_avg = round(sum(r.elapsed_sum for r in rollups) / result.ok_count, 3)
+            result.elapsed_min = min(r.elapsed_min for r in rollups if r.elapsed_min is not None)
+            result.elapsed_max = max(r.elapsed_max for r in rollups if r.elapsed_max is not None)
+        heights = [h for r in rollups for h in (r.height_min, r.height_max) if h is not None]
+        if heights:
+            result.height_delta = max(heights) - min(heights)
         return result
 
     async def get_networks_info(self) -> list[NetworkInfo]:
-        """Get summary info for all networks."""
-        live_nodes = await self.get_live_nodes()
-        return [
-            NetworkInfo(
-                network=network,
-                live_nodes=len(live_nodes.get(network, [])),
-                all_nodes=await self.core.db.node.count({"network": network}),
-            )
-            for network in Network
+        """Get summary info for all networks with one aggregation, cached for NETWORKS_INFO_TTL seconds."""
+        cached_at, info = self._networks_info_cache
+        if time.monotonic() - cached_at < NETWORKS_INFO_TTL:
+            return info
+        ok = {"$eq": ["$status", NodeStatus.OK.value]}
+        pipeline: list[dict[str, object]] = [
+            {
+                "$group": {
+                    "_id": "$network",
+                    "all_nodes": {"$sum": 1},
+                    "live_nodes": {"$sum": {"$cond": [{"$gt": ["$last_ok_at", utc(seconds=-LIVE_WINDOW)]}, 1, 0]}},
+                    "ok_nodes": {"$sum": {"$cond": [ok, 1, 0]}},
+                    "down_nodes": {"$sum": {"$cond": [{"$in": ["$status", DOWN_STATUSES]}, 1, 0]}},
+                    "max_height": {"$max": "$height"},
+                    "avg_elapsed": {"$avg": {"$cond": [ok, "$elapsed", None]}},
+                }
+            }
         ]
+        rows = {row["_id"]: row async for row in await self.core.db.node.collection.aggregate(pipeline)}
+        info = [NetworkInfo.model_validate(rows.get(network.value, {}) | {"network": network}) for network in Network]
+        self._networks_info_cache = (time.monotonic(), info)
+        return info
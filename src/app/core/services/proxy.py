@@ -1,29 +1,181 @@
-"""Proxy management service: fetches and updates proxy list."""
+"""Proxy management service: fetches and updates proxy list, scores proxies by check outcomes."""
+
+import asyncio
+import logging
+import time
+from functools import cached_property
 
 from mm_base6 import Service
 from mm_concurrency import async_mutex
 from mm_http import http_request
 from mm_std import utc
 
+from app.core import metrics
+from app.core.db import NodeStatus
+from app.core.proxy_pool import ProxyPool, ProxyStats
 from app.core.types import AppCore
 
+logger = logging.getLogger(__name__)
+
+# statuses that mean the proxy delivered a response; a node error or a bad payload is not the proxy's fault
+PROXY_OK_STATUSES = {NodeStatus.OK, NodeStatus.UNKNOWN_RESPONSE, NodeStatus.ERROR, NodeStatus.RATE_LIMITED}
+
+CANARY_TIMEOUT = 5  # seconds for a canary request through a new proxy
+CANARY_CONCURRENCY = 20  # new proxies validated at once
+CANARY_FAILED_ERRORS = frozenset({"timeout", "proxy", "connection", "dns", "error"})  # the proxy delivered nothing
+REJECTED_RETRY_TIME = 600  # seconds before a proxy that failed the canary is validated again
+ADMITTED_ID = "admitted"  # the only AdmittedProxies document
+
 
 class ProxyService(Service[AppCore]):
-    """Service for managing proxy list updates."""
+    """Service for managing proxy list updates and proxy health.
+
+    The proxy list is fetched with If-None-Match / If-Modified-Since, so an unchanged list costs a 304. Proxies that
+    are new to the list are validated in parallel with a canary request before they join the pool; proxies that
+    stay keep their health and pooled connections, dropped ones are closed. `state.proxies` holds the admitted
+    list, so a restart starts with the last known-good pool.
+
+    Only the web process runs update. It also writes the admitted list to the admitted_proxies collection, and check
+    workers reload their pool from there, so the list is fetched and validated once.
+    """
+
+    _etag: str | None = None
+    _last_modified: str | None = None
+    _listed: list[str] | None = None  # proxies of the last fetched list, admitted or not
 
     def configure_scheduler(self) -> None:
         """Schedule periodic proxy list updates."""
         self.core.scheduler.add("update_proxies", 60, self.core.services.proxy.update)
 
+    @cached_property
+    def pool(self) -> ProxyPool:
+        """Proxy pool with health scores, use choose/record to work with it."""
+        return ProxyPool()
+
+    @cached_property
+    def _rejected(self) -> dict[str, float]:  # proxy -> monotonic time it failed the canary
+        return {}
+
     @async_mutex
     async def update(self) -> int:
-        """Fetch and update proxy list, returns count or -1 on error."""
-        res = await http_request(self.core.settings.proxies_url)
-        if res.is_err():
+        """Fetch the proxy list if it changed and admit new proxies that pass the canary, returns pool size or -1 on error."""
+        self._restore()
+        headers: dict[str, str] = {}
+        if self._listed is not None:  # validators are only useful while the last list is known
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+        res = await http_request(self.core.settings.proxies_url, headers=headers)
+        if res.status_code == 304 and self._listed is not None:
+            listed = self._listed
+        elif res.is_err():
             await self.core.event("update_proxies", {"response": res.model_dump()})
             return -1
-        proxies = (res.body or "").strip().splitlines()
-        proxies = [p.strip() for p in proxies if p.strip()]
+        else:
+            listed = list(dict.fromkeys(p.strip() for p in (res.body or "").splitlines() if p.strip()))
+            response_headers = {key.lower(): value for key, value in (res.headers or {}).items()}
+            self._etag = response_headers.get("etag")
+            self._last_modified = response_headers.get("last-modified")
+            self._listed = listed
+
+        known = set(self.pool.proxies)
+        now = time.monotonic()
+        new = [p for p in listed if p not in known and now - self._rejected.get(p, -REJECTED_RETRY_TIME) >= REJECTED_RETRY_TIME]
+        passed = await self._validate(new)
+        for proxy in new:
+            if proxy in passed:
+                self._rejected.pop(proxy, None)
+            else:
+                self._rejected[proxy] = now
+        proxies = [p for p in listed if p in known or p in passed]
+        removed = known - set(proxies)
+        if new or removed:
+            logger.info("proxies updated", extra={"new": len(new), "admitted": len(passed), "removed": len(removed)})
+
+        self.pool.set_proxies(proxies)
         self.core.state.proxies = proxies
         self.core.state.proxies_updated_at = utc()
+        await self.core.db.admitted_proxies.collection.update_one(
+            {"_id": ADMITTED_ID}, {"$set": {"proxies": proxies, "updated_at": utc()}}, upsert=True
+        )
+        listed_set = set(listed)
+        for proxy in list(self._rejected):
+            if proxy not in listed_set:
+                del self._rejected[proxy]
+        for proxy in removed:
+            await self.core.services.node.http_pool.close_proxy(proxy)
+        return len(proxies)
+
+    async def reload(self) -> int:
+        """Set the pool to the list admitted by the web process, for check workers. Returns pool size."""
+        doc = await self.core.db.admitted_proxies.collection.find_one({"_id": ADMITTED_ID})
+        if doc is None:
+            self._restore()
+            return len(self.pool)
+        known = set(self.pool.proxies)
+        proxies = doc["proxies"]
+        if set(proxies) != known:
+            self.pool.set_proxies(proxies)
+            for proxy in known - set(proxies):
+                await self.core.services.node.http_pool.close_proxy(proxy)
         return len(proxies)
+
+    def choose(self, key: str | None = None) -> str | None:
+        """Pick a healthy proxy. With proxy_affinity, the same key gets the same proxy while it stays healthy."""
+        self._restore()
+        return self.pool.choose(key if self.core.settings.proxy_affinity else None)
+
+    def choose_for_batch(self, key: str) -> str | None:
+        """Pick the proxy pinned to a batch key of the scheduler, whatever proxy_affinity says."""
+        self._restore()
+        return self.pool.choose_for_batch(key)
+
+    def record(self, proxy: str | None, status: NodeStatus, elapsed: float, node_was_ok: bool) -> None:
+        """Record a check outcome against the proxy it went through.
+
+        A timeout counts against the proxy only if the node was ok on its previous check; dead nodes time out
+        through any proxy, so their timeouts are not recorded at all.
+        """
+        if not proxy or (status == NodeStatus.TIMEOUT and not node_was_ok):
+            return
+        self.pool.record(proxy, status in PROXY_OK_STATUSES, elapsed)
+
+    def get_stats(self) -> list[ProxyStats]:
+        """Get health stats of all proxies, best first."""
+        return self.pool.stats()
+
+    def collect_metrics(self) -> None:
+        """Update the proxy pool gauges before a metrics scrape."""
+        metrics.PROXY_POOL_SIZE.set(len(self.pool))
+        metrics.PROXY_POOL_QUARANTINED.set(self.pool.quarantined)
+
+    def _restore(self) -> None:
+        """Fill an empty pool from the persisted list of admitted proxies."""
+        if len(self.pool) == 0 and self.core.state.proxies:
+            self.pool.set_proxies(self.core.state.proxies)
+
+    async def _validate(self, proxies: list[str]) -> set[str]:
+        """Proxies that delivered a canary response, all of them when there is no canary."""
+        canary = self._canary_url()
+        if not proxies or canary is None:
+            return set(proxies)
+        semaphore = asyncio.Semaphore(CANARY_CONCURRENCY)
+        http_pool = self.core.services.node.http_pool
+
+        async def passes(proxy: str) -> bool:
+            async with semaphore:
+                res = await http_pool.request(canary, proxy=proxy, timeout=CANARY_TIMEOUT)
+            return res.error not in CANARY_FAILED_ERRORS
+
+        results = await asyncio.gather(*(passes(proxy) for proxy in proxies))
+        return {proxy for proxy, ok in zip(proxies, results, strict=True) if ok}
+
+    def _canary_url(self) -> str | None:
+        """Return the proxy_canary_url setting, else the URL of the best live node, else None."""
+        if self.core.settings.proxy_canary_url:
+            return self.core.settings.proxy_canary_url
+        for nodes in self.core.services.node.get_best_nodes(1).values():
+            if nodes:
+                return nodes[0].url
+        return None
@@ -1,18 +1,27 @@
 """Application entry point."""
 
 import asyncio
+import contextlib
+import logging
+import sys
 
 from mm_base6 import Core, run
 
 from app import config
 from app.core.db import Db
 from app.core.services import ServiceRegistry
+from app.core.types import AppCore
 from app.server.jinja import JinjaConfig
 
+logger = logging.getLogger(__name__)
 
-async def main() -> None:
-    """Initialize and run the application."""
-    core = await Core.init(
+WORKER_RESTART_DELAY = 5  # seconds before a crashed check worker is started again
+SUPERVISED_FLAG = "--supervised"  # the web process started the worker and does not check nodes itself
+
+
+async def init_core() -> AppCore:
+    """Initialize the application core: settings, state, database and services."""
+    return await Core.init(
         config=config.config,
         settings_cls=config.Settings,
         state_cls=config.State,
@@ -20,13 +29,63 @@ async def main() -> None:
         service_registry_cls=ServiceRegistry,
     )
 
-    await run(
-        core=core,
-        jinja_config_cls=JinjaConfig,
-        host="0.0.0.0",  # noqa: S104 # nosec - runs in Docker, host binding required
-        port=3000,
-        uvicorn_log_level="warning",
-    )
+
+async def start_check_worker() -> asyncio.subprocess.Process:
+    """Start a check worker process (app.worker), it runs its own event loop on its own CPU core."""
+    return await asyncio.create_subprocess_exec(sys.executable, "-m", "app.worker", SUPERVISED_FLAG)
+
+
+async def start_check_workers(count: int) -> list[asyncio.subprocess.Process]:
+    """Start count check worker processes."""
+    workers = [await start_check_worker() for _ in range(count)]
+    if workers:
+        logger.info("check workers started", extra={"pids": [worker.pid for worker in workers]})
+    return workers
+
+
+async def supervise_check_workers(workers: list[asyncio.subprocess.Process]) -> None:
+    """Restart check workers that crash, until cancelled. A worker that exits cleanly (code 0) was stopped on purpose."""
+
+    async def supervise(index: int) -> None:
+        while True:
+            returncode = await workers[index].wait()
+            if returncode == 0:
+                return
+            logger.warning("check worker crashed", extra={"pid": workers[index].pid, "returncode": returncode})
+            await asyncio.sleep(WORKER_RESTART_DELAY)
+            workers[index] = await start_check_worker()
+            logger.info("check worker restarted", extra={"pid": workers[index].pid})
+
+    await asyncio.gather(*(supervise(index) for index in range(len(workers))))
+
+
+async def stop_check_workers(workers: list[asyncio.subprocess.Process]) -> None:
+    """Stop check workers, they release their leases and flush buffered results on SIGTERM."""
+    for worker in workers:
+        if worker.returncode is None:
+            worker.terminate()
+    for worker in workers:
+        await worker.wait()
+
+
+async def main() -> None:
+    """Initialize and run the application."""
+    core = await init_core()
+    workers = await start_check_workers(core.services.node.check_workers)
+    supervisor = asyncio.create_task(supervise_check_workers(workers))
+    try:
+        await run(
+            core=core,
+            jinja_config_cls=JinjaConfig,
+            host="0.0.0.0",  # noqa: S104 # nosec - runs in Docker, host binding required
+            port=3000,
+            uvicorn_log_level="warning",
+        )
+    finally:
+        supervisor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await supervisor
+        await stop_check_workers(workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+"""Shared FastAPI dependencies."""
+
+from collections.abc import Callable
+from typing import Annotated
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+from app.core.pagination import projection
+
+
+def fields_param(model: type[BaseModel]) -> Callable[[str | None], dict[str, int] | None]:
+    """Dependency that parses the `fields` query param into a Mongo projection of the model, 400 on unknown fields."""
+
+    def dependency(
+        fields: Annotated[str | None, Query(description="comma-separated fields, all by default")] = None,
+    ) -> dict[str, int] | None:
+        try:
+            return projection(fields, model)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return dependency
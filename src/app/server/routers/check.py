@@ -1,19 +1,57 @@
 """Check API endpoints."""
 
+from typing import Annotated
+
 from bson import ObjectId
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
 from mm_base6 import cbv
+from mm_web3 import Network
+from starlette.responses import StreamingResponse
 
 from app.core.db import Check
+from app.core.pagination import Page, find_page, stream_ndjson
 from app.core.types import AppView
+from app.server.deps import fields_param
 
 router = APIRouter(prefix="/api/checks", tags=["check"])
 
+CheckFields = Annotated[dict[str, int] | None, Depends(fields_param(Check))]
+
+
+def check_query(network: Network | None, url: str | None) -> dict[str, object]:
+    """Build a check filter."""
+    query: dict[str, object] = {}
+    if network:
+        query["network"] = network
+    if url:
+        query["url"] = url
+    return query
+
 
 @cbv(router)
 class CBV(AppView):
     """Check-related API endpoints."""
 
+    @router.get("/")
+    async def get_checks(
+        self,
+        fields: CheckFields,
+        cursor: ObjectId | None = None,
+        limit: Annotated[int, Query(ge=1, le=5000)] = 100,
+        network: Network | None = None,
+        url: str | None = None,
+    ) -> Page:
+        """Get a page of checks, newest first. Pass `next` of the response as `cursor` to get the next page."""
+        return await find_page(self.core.db.check.collection, check_query(network, url), cursor, limit, fields, descending=True)
+
+    @router.get("/stream", response_class=StreamingResponse)
+    async def stream_checks(
+        self, fields: CheckFields, network: Network | None = None, url: str | None = None
+    ) -> StreamingResponse:
+        """Stream checks, newest first, as newline-delimited JSON."""
+        docs = stream_ndjson(self.core.db.check.collection, check_query(network, url), fields, descending=True)
+        return StreamingResponse(docs, media_type="application/x-ndjson")
+
     @router.get("/{id}")
     async def get_check(self, id: ObjectId) -> Check:
         """Get a check by ID."""
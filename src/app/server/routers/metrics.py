@@ -0,0 +1,22 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter
+from mm_base6 import cbv
+from starlette.responses import PlainTextResponse
+
+from app.core.metrics import REGISTRY
+from app.core.types import AppView
+
+router = APIRouter(tags=["system"])
+
+
+@cbv(router)
+class CBV(AppView):
+    """Metrics endpoint."""
+
+    @router.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics(self) -> PlainTextResponse:
+        """Check path metrics in the Prometheus text exposition format."""
+        self.core.services.node.collect_metrics()
+        self.core.services.proxy.collect_metrics()
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,16 +1,26 @@
 """Node API endpoints."""
 
+from typing import Annotated
+
 from bson import ObjectId
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, Query, Request
 from mm_base6 import cbv
 from mm_mongo import MongoDeleteResult
 from mm_result import Result
-from starlette.responses import PlainTextResponse
+from mm_web3 import Network
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
 
-from app.core.db import Node
+from app.core.concurrency import ConcurrencyStats
+from app.core.db import Node, RollupPeriod
+from app.core.http_pool import HttpPoolStats
+from app.core.pagination import Page, find_page, stream_ndjson
+from app.core.ranking import RankedNode
+from app.core.services.node import ExportFormat, IngestResult, Uptime
 from app.core.types import AppView
+from app.server.deps import fields_param
 
 router = APIRouter(prefix="/api/nodes", tags=["node"])
+NodeFields = Annotated[dict[str, int] | None, Depends(fields_param(Node))]
 
 
 @cbv(router)
@@ -18,25 +28,103 @@ class CBV(AppView):
     """Node-related API endpoints."""
 
     @router.get("/")
-    async def get_nodes(self) -> list[Node]:
-        """Get all nodes."""
-        return await self.core.db.node.find({})
+    async def get_nodes(
+        self,
+        fields: NodeFields,
+        cursor: ObjectId | None = None,
+        limit: Annotated[int, Query(ge=1, le=5000)] = 500,
+        network: Network | None = None,
+    ) -> Page:
+        """Get a page of nodes ordered by id. Pass `next` of the response as `cursor` to get the next page."""
+        query = {"network": network} if network else {}
+        return await find_page(self.core.db.node.collection, query, cursor, limit, fields)
+
+    @router.get("/stream", response_class=StreamingResponse)
+    async def stream_nodes(self, fields: NodeFields, network: Network | None = None) -> StreamingResponse:
+        """Stream all nodes as newline-delimited JSON."""
+        query = {"network": network} if network else {}
+        return StreamingResponse(stream_ndjson(self.core.db.node.collection, query, fields), media_type="application/x-ndjson")
 
     @router.get("/export", response_class=PlainTextResponse)
-    async def export_nodes(self) -> str:
-        """Export all nodes as TOML."""
-        return await self.core.services.node.export_as_toml()
+    async def export_nodes(
+        self,
+        fmt: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.TOML,
+        network: Network | None = None,
+        if_none_match: Annotated[str | None, Header()] = None,
+    ) -> Response:
+        """Export nodes as TOML (the import format) or JSON, all networks or one. Supports ETag / If-None-Match."""
+        export = await self.core.services.node.export_nodes(fmt, network)
+        headers = {"ETag": export.etag}
+        if if_none_match == export.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(export.body, media_type=export.media_type, headers=headers)
+
+    @router.post("/import")
+    async def import_nodes(self, network: Network, request: Request) -> IngestResult:
+        """Add nodes from a request body of newline-delimited URLs. The body is streamed, not loaded at once."""
+        return await self.core.services.node.add_stream(network, request.stream())
+
+    @router.get("/live", response_model=dict[str, list[str]])
+    async def get_live_nodes(self, if_none_match: Annotated[str | None, Header()] = None) -> Response:
+        """Get live node URLs grouped by network. Supports ETag / If-None-Match."""
+        snapshot = await self.core.services.node.get_live_snapshot()
+        headers = {"ETag": snapshot.etag}
+        if if_none_match == snapshot.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(snapshot.body, media_type="application/json", headers=headers)
+
+    @router.get("/events", response_class=StreamingResponse)
+    async def stream_events(self, network: Network | None = None) -> StreamingResponse:
+        """Stream node events as Server-Sent Events: status (up/down transitions), height, live_count, dropped."""
+        return StreamingResponse(
+            await self.core.services.node.stream_events(network),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    @router.get("/live")
-    async def get_live_nodes(self) -> dict[str, list[str]]:
-        """Get live node URLs grouped by network."""
-        nodes = await self.core.services.node.get_live_nodes()
-        return {network.value: [node.url for node in nodes] for network, nodes in nodes.items()}
+    @router.get("/best")
+    async def get_best_nodes(
+        self,
+        limit: Annotated[int, Query(ge=1, le=100)] = 5,
+        max_lag: Annotated[int | None, Query(ge=0)] = None,
+        network: Network | None = None,
+    ) -> dict[str, list[RankedNode]]:
+        """Get the top live nodes per network ranked by lag from the tip, then by median latency."""
+        best = self.core.services.node.get_best_nodes(limit, max_lag, network)
+        return {network.value: nodes for network, nodes in best.items()}
+
+    @router.get("/http-pool")
+    async def get_http_pool_stats(self) -> HttpPoolStats:
+        """Get connection reuse counters of the RPC HTTP pool."""
+        return self.core.services.node.http_pool.stats
+
+    @router.get("/concurrency")
+    async def get_concurrency(self) -> ConcurrencyStats:
+        """Get the effective concurrent check limit, its load signals and the recent adjustments with their reasons."""
+        return self.core.services.node.concurrency.stats()
 
     @router.post("/{id}/check")
-    async def check_node(self, id: ObjectId) -> Result[int]:
-        """Trigger a health check for a specific node."""
-        return await self.core.services.node.check(id)
+    async def check_node(self, id: ObjectId, response: Response, force: bool = False) -> Result[int]:
+        """Trigger a health check for a specific node.
+
+        The X-Check-Source header says where the result came from: fresh, shared (a check of the node was already
+        running) or cached (a check finished up to check_result_max_age seconds ago, see the Age header). force skips
+        the cached result.
+        """
+        outcome = await self.core.services.node.request_check(id, force)
+        response.headers["X-Check-Source"] = outcome.source.value
+        response.headers["Age"] = str(int(outcome.age))
+        return outcome.result
+
+    @router.get("/{id}/uptime")
+    async def get_node_uptime(
+        self,
+        id: ObjectId,
+        hours: Annotated[int, Query(ge=1, le=90 * 24)] = 24,
+        period: RollupPeriod = RollupPeriod.HOUR,
+    ) -> Uptime:
+        """Get uptime and latency of a node over the last hours, read from minute (kept 2 days) or hour rollups."""
+        return await self.core.services.node.get_uptime(id, period, hours)
 
     @router.get("/{id}")
     async def get_node(self, id: ObjectId) -> Node:
@@ -46,4 +134,4 @@ class CBV(AppView):
     @router.delete("/{id}")
     async def delete_node(self, id: ObjectId) -> MongoDeleteResult:
         """Delete a node by ID."""
-        return await self.core.db.node.delete(id)
+        return await self.core.services.node.delete(id)
@@ -3,6 +3,7 @@
 from fastapi import APIRouter
 from mm_base6 import cbv
 
+from app.core.proxy_pool import ProxyStats
 from app.core.types import AppView
 
 router = APIRouter(prefix="/api/proxies", tags=["proxy"])
@@ -12,6 +13,11 @@ router = APIRouter(prefix="/api/proxies", tags=["proxy"])
 class CBV(AppView):
     """Proxy-related API endpoints."""
 
+    @router.get("/stats")
+    async def get_proxy_stats(self) -> list[ProxyStats]:
+        """Get health stats of all proxies, best first."""
+        return self.core.services.proxy.get_stats()
+
     @router.post("/update")
     async def update_proxies(self) -> int:
         """Trigger proxy list update."""
@@ -2,14 +2,18 @@
 
 from typing import Annotated
 
+from bson import ObjectId
 from fastapi import APIRouter, Form, Query
 from mm_base6 import cbv, redirect
 from mm_web3 import Network
 from pydantic import BaseModel, BeforeValidator
 from starlette.responses import HTMLResponse, RedirectResponse
 
+from app.core.db import Check
 from app.core.types import AppView
 
+CHECKS_PAGE_SIZE = 200
+
 
 def empty_to_none(v: str | None) -> str | None:
     """Convert empty string to None for optional query params."""
@@ -46,10 +50,15 @@ class PageCBV(AppView):
         return await self.render.html("networks.j2", info=info)
 
     @router.get("/checks")
-    async def checks(self) -> HTMLResponse:
-        """Render the checks history page."""
-        checks = await self.core.db.check.find({}, "created_at", limit=1000)
-        return await self.render.html("checks.j2", checks=checks)
+    async def checks(self, cursor: ObjectId | None = None) -> HTMLResponse:
+        """Render the checks history page, newest first, one page at a time. Raw responses are not loaded."""
+        query = {"_id": {"$lt": cursor}} if cursor else {}
+        docs = await self.core.db.check.collection.find(
+            query, {"response": 0}, sort=[("_id", -1)], limit=CHECKS_PAGE_SIZE + 1
+        ).to_list()
+        checks = [Check.model_validate(doc | {"response": {}}) for doc in docs[:CHECKS_PAGE_SIZE]]
+        next_cursor = checks[-1].id if len(docs) > CHECKS_PAGE_SIZE else None
+        return await self.render.html("checks.j2", checks=checks, next_cursor=next_cursor)
 
 
 @cbv(router)
@@ -66,12 +75,12 @@ class ActionCBV(AppView):
     async def add_nodes(self, form: Annotated[AddNodes, Form()]) -> RedirectResponse:
         """Handle add nodes form submission."""
         res = await self.core.services.node.add(form.network, form.urls)
-        self.render.flash(f"nodes added: {res}")
+        self.render.flash(f"add nodes, {res}")
         return redirect("/nodes")
 
     @router.post("/nodes/import")
     async def import_nodes(self, toml: Annotated[str, Form()]) -> RedirectResponse:
         """Handle import nodes from TOML form submission."""
         res = await self.core.services.node.import_from_toml(toml)
-        self.render.flash(f"nodes imported: {res}")
+        self.render.flash(f"import nodes, {res}")
         return redirect("/nodes")
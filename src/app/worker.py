@@ -0,0 +1,69 @@
+"""Check worker entry point: claims due nodes via Mongo leases and checks them, without the web server.
+
+Started by app.main when the `check_workers` setting is above 0. More workers on other hosts or containers can be
+started with `python -m app.worker`; they share the nodes through the leases. Settings are read once at start.
+"""
+
+import asyncio
+import contextlib
+import logging
+import signal
+import sys
+from collections.abc import Awaitable, Callable
+
+import anyio
+
+from app.core.check_leases import LeaseChecker, worker_id
+from app.core.check_writer import FLUSH_INTERVAL
+from app.core.types import AppCore
+from app.main import SUPERVISED_FLAG, init_core
+
+logger = logging.getLogger(__name__)
+
+EVICT_IDLE_INTERVAL = 60  # seconds between closing idle pooled HTTP sessions
+PROXY_RELOAD_INTERVAL = 60  # seconds between reloads of the proxy list admitted by the web process
+
+
+async def every(interval: float, func: Callable[[], Awaitable[object]]) -> None:
+    """Call an async function every interval seconds, logging its errors."""
+    while True:
+        await anyio.sleep(interval)
+        try:
+            await func()
+        except Exception:
+            logger.exception("periodic job failed")
+
+
+async def run_worker(core: AppCore) -> None:
+    """Check nodes until cancelled, then release leases and flush buffered results."""
+    checker = LeaseChecker(core, worker_id())
+    node_service = core.services.node
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(checker.run)
+            tg.start_soon(every, FLUSH_INTERVAL, node_service.check_writer.flush)
+            tg.start_soon(every, EVICT_IDLE_INTERVAL, node_service.http_pool.evict_idle)
+            tg.start_soon(every, PROXY_RELOAD_INTERVAL, core.services.proxy.reload)
+    finally:
+        with anyio.CancelScope(shield=True):
+            await node_service.on_stop()
+            released = await checker.release()
+            logger.info("check worker stopped", extra={"owner": checker.owner, "released": released})
+
+
+async def main() -> None:
+    """Initialize the core and run the worker until SIGTERM or SIGINT."""
+    core = await init_core()
+    if SUPERVISED_FLAG not in sys.argv[1:] and core.services.node.check_workers == 0:
+        logger.error("check_workers is 0, the web process checks nodes itself; the worker would duplicate its checks")
+        return
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, task.cancel)  # type: ignore[union-attr]
+    with contextlib.suppress(asyncio.CancelledError):
+        await run_worker(core)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
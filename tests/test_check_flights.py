@@ -0,0 +1,148 @@
+"""CheckFlights: joining running checks, the result cache and cancellation of callers."""
+
+# ruff: noqa: SLF001 - the tests age cached results by rewriting their finish time
+
+import asyncio
+
+import pytest
+
+check_flights = pytest.importorskip("app.core.check_flights")
+
+from bson import ObjectId  # noqa: E402
+from mm_result import Result  # noqa: E402
+
+CheckSource = check_flights.CheckSource
+
+
+class Probe:
+    """A check that counts its runs and finishes when released."""
+
+    def __init__(self, height: int = 100) -> None:
+        self.height = height
+        self.runs = 0
+        self.released = asyncio.Event()
+
+    async def __call__(self) -> Result[int]:
+        self.runs += 1
+        await self.released.wait()
+        return Result.ok(self.height)
+
+
+def test_callers_of_a_running_check_join_it():
+    async def main() -> None:
+        flights = check_flights.CheckFlights()
+        probe = Probe()
+        id = ObjectId()
+        first = asyncio.ensure_future(flights.run(id, probe, keep=10))
+        second = asyncio.ensure_future(flights.run(id, probe, keep=10))
+        await asyncio.sleep(0)
+        assert len(flights) == 1
+        probe.released.set()
+        outcomes = await asyncio.gather(first, second)
+        assert [o.source for o in outcomes] == [CheckSource.FRESH, CheckSource.SHARED]
+        assert [o.result.unwrap() for o in outcomes] == [100, 100]
+        assert probe.runs == 1
+        assert len(flights) == 0
+
+        probe.released.set()  # a check after the first one finished is a new one
+        outcome = await flights.run(id, probe, keep=10)
+        assert outcome.source == CheckSource.FRESH
+        assert probe.runs == 2
+
+    asyncio.run(main())
+
+
+def test_checks_of_different_nodes_run_apart():
+    async def main() -> None:
+        flights = check_flights.CheckFlights()
+        probe = Probe()
+        probe.released.set()
+        outcomes = await asyncio.gather(flights.run(ObjectId(), probe, keep=10), flights.run(ObjectId(), probe, keep=10))
+        assert [o.source for o in outcomes] == [CheckSource.FRESH, CheckSource.FRESH]
+        assert probe.runs == 2
+
+    asyncio.run(main())
+
+
+def test_recent_result_is_served_until_it_expires():
+    async def main() -> None:
+        flights = check_flights.CheckFlights()
+        probe = Probe()
+        probe.released.set()
+        id = ObjectId()
+        await flights.run(id, probe, keep=10)
+        recent = flights.recent(id, max_age=5)
+        assert recent is not None
+        assert recent.source == CheckSource.CACHED
+        assert recent.result.unwrap() == 100
+        assert 0 <= recent.age < 1
+
+        finished_at, result = flights._recent[id]
+        flights._recent[id] = (finished_at - 7, result)
+        assert flights.recent(id, max_age=5) is None  # older than the caller accepts
+        assert flights.recent(id, max_age=8).age == pytest.approx(7, abs=1)
+
+        await flights.run(ObjectId(), probe, keep=5)  # a new result evicts entries older than its keep
+        assert id not in flights._recent
+
+        flights.forget(next(iter(flights._recent)))
+        assert not flights._recent
+
+    asyncio.run(main())
+
+
+def test_results_are_not_kept_without_keep_or_on_error():
+    async def main() -> None:
+        flights = check_flights.CheckFlights()
+        probe = Probe()
+        probe.released.set()
+        id = ObjectId()
+        await flights.run(id, probe, keep=0)
+        assert flights.recent(id, max_age=10) is None
+
+        async def failing() -> Result[int]:
+            raise RuntimeError("probe crashed")
+
+        with pytest.raises(RuntimeError):
+            await flights.run(id, failing, keep=10)
+        assert flights.recent(id, max_age=10) is None
+        assert len(flights) == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_check():
+    async def main() -> None:
+        flights = check_flights.CheckFlights()
+        probe = Probe()
+        id = ObjectId()
+        impatient = asyncio.ensure_future(flights.run(id, probe, keep=10))
+        patient = asyncio.ensure_future(flights.run(id, probe, keep=10))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        await asyncio.sleep(0)
+        assert impatient.cancelled()
+        assert len(flights) == 1
+        probe.released.set()
+        outcome = await patient
+        assert outcome.result.unwrap() == 100
+        assert probe.runs == 1
+        assert flights.recent(id, max_age=10) is not None
+
+    asyncio.run(main())
+
+
+def test_cancel_stops_running_checks():
+    async def main() -> None:
+        flights = check_flights.CheckFlights()
+        probe = Probe()
+        id = ObjectId()
+        caller = asyncio.ensure_future(flights.run(id, probe, keep=10))
+        await asyncio.sleep(0)
+        await flights.cancel()
+        assert len(flights) == 0
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert flights.recent(id, max_age=10) is None
+
+    asyncio.run(main())
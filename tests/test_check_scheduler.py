@@ -0,0 +1,222 @@
+"""CheckScheduler heap, batch key queues and rate limit deferral, against a stand-in core."""
+
+# ruff: noqa: SLF001 - the tests drive the scheduler step by step through its private loop helpers
+
+import asyncio
+import contextlib
+import time
+from types import SimpleNamespace
+
+import pytest
+
+check_scheduler = pytest.importorskip("app.core.check_scheduler")
+rate_limit = pytest.importorskip("app.core.rate_limit")
+
+from bson import ObjectId  # noqa: E402
+from mm_web3 import Network  # noqa: E402
+
+CHECK_INTERVAL = 30
+
+
+def make_core(host_rate_limits: str = "") -> SimpleNamespace:
+    """Stand-in for AppCore with just what the scheduler reads."""
+    settings = SimpleNamespace(check_workers=0, check_interval=CHECK_INTERVAL, host_rate_limits=host_rate_limits)
+    core = SimpleNamespace(settings=settings, services=SimpleNamespace())
+    core.services.node = SimpleNamespace(check_workers=0, rate_limits=rate_limit.HostRateLimiter(core))
+    return core
+
+
+def make_scheduler(host_rate_limits: str = ""):
+    return check_scheduler.CheckScheduler(make_core(host_rate_limits))
+
+
+def add(scheduler, url: str, due: float) -> ObjectId:
+    """Schedule a new node of url, the way sync does."""
+    id = ObjectId()
+    scheduler._keys[id] = check_scheduler.batch_key(url, Network.ETHEREUM)
+    scheduler.schedule(id, due)
+    return id
+
+
+def take_all(scheduler, size: int = 1) -> list[list[ObjectId]]:
+    scheduler._queue_due()
+    batches = []
+    while batch := scheduler._take_batch(size):
+        batches.append(batch)
+    return batches
+
+
+def test_rescheduled_node_is_queued_once_at_its_latest_due_time():
+    scheduler = make_scheduler()
+    now = time.time()
+    id = add(scheduler, "https://a.example.com", now - 10)
+    scheduler.schedule(id, now + 60)  # the past entry stays in the heap, but is stale
+    scheduler._queue_due()
+    assert id not in scheduler._queued
+    assert scheduler._due[id] == now + 60
+    assert scheduler._heap == [(now + 60, id)]
+
+    scheduler.schedule(id, now - 5)
+    scheduler.schedule(id, now - 1)
+    assert take_all(scheduler) == [[id]]
+    assert scheduler._heap == []
+    assert scheduler.size == 1  # running
+
+
+def test_discarded_queued_node_is_not_taken():
+    scheduler = make_scheduler()
+    id = add(scheduler, "https://a.example.com", time.time() - 1)
+    scheduler._queue_due()
+    scheduler.discard(id)
+    assert scheduler._take_batch(1) == []
+    assert scheduler.size == 0
+
+
+def test_discarded_running_node_is_not_rescheduled():
+    scheduler = make_scheduler()
+    core = scheduler.core
+    checked = []
+
+    async def check(id: ObjectId, proxy: str | None = None) -> None:
+        checked.append((id, proxy))
+        scheduler.discard(id)  # deleted while its check runs
+        scheduler.schedule(id, time.time() + CHECK_INTERVAL)  # the check schedules the next one, as NodeService does
+
+    core.services.node.check = check
+    id = add(scheduler, "https://a.example.com", time.time() - 1)
+    assert take_all(scheduler) == [[id]]
+    asyncio.run(scheduler._check_node(id, None))
+    assert checked == [(id, None)]
+    assert id not in scheduler._due
+    assert not scheduler._running
+    assert not scheduler._discarded  # cleared once the check is done, so a re-added node is scheduled again
+
+
+def test_failed_check_reschedules_an_existing_node():
+    scheduler = make_scheduler()
+    core = scheduler.core
+
+    async def check(id: ObjectId, proxy: str | None = None) -> None:
+        raise RuntimeError(f"check of {id} through {proxy} failed")
+
+    async def exists(query: dict) -> bool:
+        return "_id" in query  # the node is still there
+
+    core.services.node.check = check
+    core.db = SimpleNamespace(node=SimpleNamespace(exists=exists))
+    id = add(scheduler, "https://a.example.com", time.time() - 1)
+    take_all(scheduler)
+    asyncio.run(scheduler._check_node(id, None))
+    assert scheduler._due[id] == pytest.approx(time.time() + CHECK_INTERVAL, abs=1)
+
+
+def test_failed_lookup_after_a_failed_check_keeps_the_node():
+    scheduler = make_scheduler()
+    core = scheduler.core
+
+    async def check(id: ObjectId, proxy: str | None = None) -> None:
+        raise RuntimeError(f"check of {id} through {proxy} failed")
+
+    async def exists(query: dict) -> bool:
+        raise RuntimeError(f"mongo is down, no lookup of {query}")
+
+    core.services.node.check = check
+    core.db = SimpleNamespace(node=SimpleNamespace(exists=exists))
+    id = add(scheduler, "https://a.example.com", time.time() - 1)
+    take_all(scheduler)
+    asyncio.run(scheduler._check_node(id, None))  # does not raise, so other checks of the task group go on
+    assert scheduler._due[id] == pytest.approx(time.time() + CHECK_INTERVAL, abs=1)
+
+
+def test_batch_keys_are_served_round_robin():
+    scheduler = make_scheduler()
+    now = time.time()
+    a = [add(scheduler, "https://a.example.com/" + str(i), now - 10 + i) for i in range(3)]
+    b = [add(scheduler, "https://b.example.com/" + str(i), now - 10 + i) for i in range(2)]
+    assert take_all(scheduler) == [[a[0]], [b[0]], [a[1]], [b[1]], [a[2]]]
+
+
+def test_batch_takes_nodes_of_one_key():
+    scheduler = make_scheduler()
+    now = time.time()
+    a = [add(scheduler, "https://a.example.com/" + str(i), now - 10 + i) for i in range(3)]
+    b = add(scheduler, "https://b.example.com", now - 10)
+    assert take_all(scheduler, size=2) == [[a[0], a[1]], [b], [a[2]]]
+
+
+def test_batch_nodes_run_in_their_own_slots_through_one_proxy():
+    scheduler = make_scheduler()
+    core = scheduler.core
+    core.settings.auto_check = True
+    core.settings.check_batch_size = 3
+    scheduler._synced_at = scheduler._full_synced_at = time.monotonic() + 60  # no sync, the nodes are added below
+    scheduler._spread_pending = False
+    keys = []
+    checks = []
+    in_flight = []
+
+    async def adapt(_signals) -> None:
+        await asyncio.sleep(60)
+
+    async def check(id: ObjectId, proxy: str | None = None) -> None:
+        checks.append((id, proxy))
+        in_flight.append(scheduler.in_flight)
+        await asyncio.sleep(0.2)
+        scheduler.schedule(id, time.time() + CHECK_INTERVAL)
+
+    def choose_for_batch(key: str) -> str:
+        keys.append(key)
+        return "http://proxy-1"
+
+    core.services.node.concurrency = SimpleNamespace(limit=2, run=adapt)
+    core.services.node.check = check
+    core.services.proxy = SimpleNamespace(choose_for_batch=choose_for_batch)
+    a = [add(scheduler, "https://a.example.com/" + str(i), time.time() - 10 + i) for i in range(3)]
+
+    async def run() -> None:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(scheduler.run(), 0.3)
+
+    asyncio.run(run())
+    # the limit of 2 slots cuts the first batch to 2 nodes, they run side by side; the third waits for a free slot
+    assert checks == [(a[0], "http://proxy-1"), (a[1], "http://proxy-1"), (a[2], None)]
+    assert in_flight == [2, 2, 1]
+    assert keys == [scheduler._keys[a[0]]]
+
+
+def test_batch_keys_split_by_network_type():
+    assert check_scheduler.batch_key("https://a.example.com/x", Network.ETHEREUM) != check_scheduler.batch_key(
+        "https://a.example.com/y", Network.SOLANA
+    )
+    key = check_scheduler.batch_key("https://A.example.com:8545/x", Network.ETHEREUM)
+    assert check_scheduler.batch_key_host(key) == "a.example.com"
+
+
+def test_rate_limited_host_is_deferred_at_its_rate():
+    scheduler = make_scheduler("a.example.com 2 1")
+    now = time.time()
+    a = [add(scheduler, "https://a.example.com/" + str(i), now - 10 + i) for i in range(3)]
+    b = add(scheduler, "https://b.example.com", now - 10)
+    assert take_all(scheduler) == [[a[0]], [b]]
+    # a[1] and a[2] went back to the heap, staggered by the host interval of 0.5 seconds
+    assert scheduler._due[a[1]] == pytest.approx(now + 0.5, abs=0.1)
+    assert scheduler._due[a[2]] == pytest.approx(now + 1.0, abs=0.1)
+    assert not scheduler._queued
+    assert scheduler.size == 4
+
+
+def test_stale_queue_entries_do_not_take_rate_limit_tokens():
+    scheduler = make_scheduler("a.example.com 1 1")
+    now = time.time()
+    gone = add(scheduler, "https://a.example.com/gone", now - 2)
+    live = add(scheduler, "https://a.example.com/live", now - 1)
+    scheduler._queue_due()
+    scheduler.discard(gone)
+    assert scheduler._take_batch(1) == [live]
+
+
+def test_workers_keep_the_scheduler_empty():
+    scheduler = make_scheduler()
+    scheduler.core.services.node.check_workers = 2
+    add(scheduler, "https://a.example.com", time.time() - 1)
+    assert scheduler.size == 0
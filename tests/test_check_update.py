@@ -0,0 +1,102 @@
+"""Node.check_update pipeline against a local database: history eviction, counters and legacy migration.
+
+Skipped when no MongoDB answers at MONGO_TEST_URL (default mongodb://localhost:27017).
+"""
+
+import os
+import random
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+db_models = pytest.importorskip("app.core.db")
+
+from bson import ObjectId  # noqa: E402
+from pymongo.errors import PyMongoError  # noqa: E402
+
+Node = db_models.Node
+HISTORY_SIZE = db_models.HISTORY_SIZE
+
+
+@pytest.fixture(scope="module")
+def node_collection():
+    client = pymongo.MongoClient(os.getenv("MONGO_TEST_URL", "mongodb://localhost:27017"), serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("no MongoDB for check_update tests")
+    name = f"test_check_update_{os.getpid()}"
+    client.drop_database(name)
+    yield client[name].node
+    client.drop_database(name)
+    client.close()
+
+
+def insert(collection, **fields) -> ObjectId:
+    id = ObjectId()
+    collection.insert_one({"_id": id, "url": f"https://{id}.example.com", "status": "not_checked"} | fields)
+    return id
+
+
+def check(collection, id: ObjectId, ok: bool | None, **fields) -> dict:
+    collection.update_one({"_id": id}, Node.check_update(ok, fields))
+    return collection.find_one({"_id": id})
+
+
+def assert_counters(doc: dict) -> None:
+    assert doc["history_ok_count"] == doc["history"].count("1")
+    assert doc["history_down_count"] == doc["history"].count("0")
+
+
+def test_history_is_newest_first_and_evicts_past_the_limit(node_collection):
+    id = insert(node_collection, history="", history_ok_count=0, history_down_count=0)
+    results = [random.random() < 0.5 for _ in range(HISTORY_SIZE + 30)]
+    expected = ""
+    for ok in results:
+        doc = check(node_collection, id, ok, status="ok" if ok else "timeout")
+        expected = ("1" if ok else "0") + expected
+        assert doc["history"] == expected[:HISTORY_SIZE]
+        assert_counters(doc)
+    assert len(doc["history"]) == HISTORY_SIZE
+    assert doc["status"] == ("ok" if results[-1] else "timeout")
+
+
+def test_evicting_the_oldest_result_updates_its_counter(node_collection):
+    id = insert(node_collection, history="1" * (HISTORY_SIZE - 1) + "0", history_ok_count=HISTORY_SIZE - 1, history_down_count=1)
+    doc = check(node_collection, id, True)
+    assert doc["history"] == "1" * HISTORY_SIZE
+    assert (doc["history_ok_count"], doc["history_down_count"]) == (HISTORY_SIZE, 0)
+    doc = check(node_collection, id, False)
+    assert doc["history"] == "0" + "1" * (HISTORY_SIZE - 1)
+    assert (doc["history_ok_count"], doc["history_down_count"]) == (HISTORY_SIZE - 1, 1)
+
+
+def test_legacy_check_history_is_migrated_on_the_first_update(node_collection):
+    legacy = [True, False, False] + [True] * HISTORY_SIZE  # newest first, longer than the limit
+    id = insert(node_collection, check_history=legacy)
+    doc = check(node_collection, id, False)
+    expected = "0" + "100" + "1" * (HISTORY_SIZE - 4)
+    assert doc["history"] == expected
+    assert_counters(doc)
+    assert "check_history" not in doc
+
+
+def test_proxy_failure_leaves_history_alone(node_collection):
+    id = insert(node_collection, history="10", history_ok_count=1, history_down_count=1)
+    doc = check(node_collection, id, None, status="proxy", height=None)
+    assert doc["history"] == "10"
+    assert (doc["history_ok_count"], doc["history_down_count"]) == (1, 1)
+    assert doc["status"] == "proxy"
+    assert doc["height"] is None
+
+    legacy = insert(node_collection, check_history=[False, True])
+    doc = check(node_collection, legacy, None, status="proxy")
+    assert doc["history"] == "01"
+    assert_counters(doc)
+    assert "check_history" not in doc
+
+
+def test_field_values_are_set_literally(node_collection):
+    id = insert(node_collection, history="", history_ok_count=0, history_down_count=0)
+    doc = check(node_collection, id, True, status="ok", response={"error": "$history"})
+    assert doc["response"] == {"error": "$history"}  # a "$" string from a node is not read as a field path
@@ -0,0 +1,18 @@
+"""HttpPool pre-probe."""
+
+import asyncio
+
+import pytest
+
+http_pool = pytest.importorskip("app.core.http_pool")
+
+
+def test_probe_through_a_proxy_leaves_the_host_to_the_proxy():
+    async def main() -> None:
+        pool = http_pool.HttpPool()
+        try:
+            assert await pool.probe("https://unresolvable.invalid", proxy="http://127.0.0.1:1") is None
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
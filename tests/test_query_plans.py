@@ -0,0 +1,196 @@
+"""Query plans of the hot Mongo queries against a seeded local database.
+
+Each query is explained with executionStats and must not use a COLLSCAN or a blocking SORT, and must examine
+at most its docs budget. Skipped when no MongoDB answers at MONGO_TEST_URL (default mongodb://localhost:27017).
+Full scans by design, like the full scheduler sync and the networks summary aggregation, are not listed.
+"""
+
+import os
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+db_models = pytest.importorskip("app.core.db")
+check_leases = pytest.importorskip("app.core.check_leases")
+live_index = pytest.importorskip("app.core.live_index")
+ui = pytest.importorskip("app.server.routers.ui")
+
+from bson import ObjectId  # noqa: E402
+from pymongo import IndexModel  # noqa: E402
+from pymongo.errors import PyMongoError  # noqa: E402
+
+NETWORKS = ["ethereum", "arbitrum-one", "solana", "aptos"]
+NODES = 20_000  # 5000 per network
+CHECKS = 20_000
+LIVE_SHARE = 10  # every 10th node is live
+DUE_SHARE = 2  # every 2nd node is due
+RECENT_NODES = 50  # created after the incremental sync watermark
+ROLLUP_NODES = 100
+ROLLUP_HOURS = 48
+PAGE_SIZE = 500
+
+NOW = datetime.now(UTC).replace(microsecond=0)
+
+
+def index_models(model: type) -> list[IndexModel]:
+    """IndexModels of a model's __indexes__, "!field" is a unique index."""
+    result = []
+    for index in model.__indexes__:
+        if isinstance(index, IndexModel):
+            result.append(index)
+        else:
+            result.append(IndexModel([(index.removeprefix("!"), 1)], unique=index.startswith("!")))
+    return result
+
+
+def seed(db) -> dict[str, object]:
+    node_ids = [ObjectId() for _ in range(NODES)]
+    nodes = []
+    for i, id in enumerate(node_ids):
+        created_at = NOW - timedelta(days=1) + timedelta(seconds=i) if i >= NODES - RECENT_NODES else NOW - timedelta(days=2)
+        nodes.append(
+            {
+                "_id": id,
+                "network": NETWORKS[i % len(NETWORKS)],
+                "url": f"https://node-{i}.example.com",
+                "status": "ok" if i % LIVE_SHARE == 0 else "timeout",
+                "next_check_at": NOW - timedelta(seconds=i) if i % DUE_SHARE == 0 else NOW + timedelta(seconds=i),
+                "lease_owner": "worker:1" if i % 7 == 0 else None,
+                "lease_until": NOW + timedelta(seconds=60) if i % 7 == 0 else None,
+                "last_ok_at": NOW - timedelta(seconds=10) if i % LIVE_SHARE == 0 else NOW - timedelta(days=1),
+                "created_at": created_at,
+            }
+        )
+    db.node.insert_many(nodes)
+
+    checks = [
+        {
+            "_id": ObjectId(),
+            "network": NETWORKS[i % len(NETWORKS)],
+            "url": f"https://node-{i % NODES}.example.com",
+            "status": "ok",
+            "elapsed": 0.1,
+            "response": {},
+            "created_at": NOW - timedelta(seconds=CHECKS - i),
+        }
+        for i in range(CHECKS)
+    ]
+    db.check.insert_many(checks)
+
+    rollups = [
+        {
+            "node_id": node_ids[n],
+            "network": NETWORKS[n % len(NETWORKS)],
+            "url": f"https://node-{n}.example.com",
+            "period": period,
+            "bucket": NOW.replace(minute=0, second=0) - timedelta(hours=h),
+            "ok_count": 60,
+            "fail_count": 0,
+            "expire_at": NOW + timedelta(days=90),
+        }
+        for n in range(ROLLUP_NODES)
+        for period in ("hour", "minute")
+        for h in range(ROLLUP_HOURS)
+    ]
+    db.check_rollup.insert_many(rollups)
+
+    for model in (db_models.Node, db_models.Check, db_models.CheckRollup):
+        db[model.__collection__].create_indexes(index_models(model))
+    return {"node_id": node_ids[0], "node_cursor": node_ids[NODES // 2], "check_cursor": checks[CHECKS // 2]["_id"]}
+
+
+@pytest.fixture(scope="module")
+def seeded_db():
+    client = pymongo.MongoClient(os.getenv("MONGO_TEST_URL", "mongodb://localhost:27017"), serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("no MongoDB for query plan tests")
+    name = f"test_query_plans_{os.getpid()}"
+    client.drop_database(name)
+    database = client[name]
+    yield database, seed(database)
+    client.drop_database(name)
+    client.close()
+
+
+def explain(db, collection: str, query: dict, sort: list | None, limit: int):
+    command = {"find": collection, "filter": query}
+    if sort:
+        command["sort"] = dict(sort)
+    if limit:
+        command["limit"] = limit
+    return db.command("explain", command, verbosity="executionStats")
+
+
+def stages(plan) -> list[str]:
+    """All stage names in a plan tree, classic or slot-based engine."""
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    result = [plan["stage"]] if "stage" in plan else []
+    for value in plan.values():
+        if isinstance(value, dict | list):
+            result += stages(value)
+    return result
+
+
+def hot_queries(seeded: dict[str, object]) -> list[tuple[str, str, dict, list | None, int, int]]:
+    """(name, collection, filter, sort, limit, docs examined budget) of each hot query."""
+    per_network = NODES // len(NETWORKS)
+    live = NODES // LIVE_SHARE
+    return [
+        ("lease claim", "node", check_leases.claim_filter(NOW), [("next_check_at", 1)], 1, 10),
+        ("incremental sync", "node", {"created_at": {"$gte": NOW - timedelta(days=1)}}, None, 0, RECENT_NODES),
+        ("live index load", "node", {"last_ok_at": {"$gt": NOW - timedelta(seconds=live_index.LIVE_WINDOW)}}, None, 0, live),
+        ("checked node sync", "node", {"last_ok_at": {"$gt": NOW - timedelta(minutes=1), "$lte": NOW}}, None, 0, live),
+        ("export all", "node", {}, [("url", 1)], 0, NODES),
+        ("export network", "node", {"network": "solana"}, [("url", 1)], 0, per_network),
+        ("ui nodes of network", "node", {"network": "solana"}, [("network", 1)], 0, per_network),
+        ("node page", "node", {}, [("_id", 1)], PAGE_SIZE + 1, PAGE_SIZE + 1),
+        (
+            "node page of network",
+            "node",
+            {"network": "solana", "_id": {"$gt": seeded["node_cursor"]}},
+            [("_id", 1)],
+            PAGE_SIZE + 1,
+            PAGE_SIZE + 1,
+        ),
+        ("check page", "check", {"_id": {"$lt": seeded["check_cursor"]}}, [("_id", -1)], 101, 101),
+        ("check page of network", "check", {"network": "aptos"}, [("_id", -1)], 101, 101),
+        ("check page of node", "check", {"url": "https://node-1.example.com"}, [("_id", -1)], 101, 101),
+        (
+            "ui checks",
+            "check",
+            {"_id": {"$lt": seeded["check_cursor"]}},
+            [("_id", -1)],
+            ui.CHECKS_PAGE_SIZE + 1,
+            ui.CHECKS_PAGE_SIZE + 1,
+        ),
+        (
+            "uptime",
+            "check_rollup",
+            {"node_id": seeded["node_id"], "period": "hour", "bucket": {"$gte": NOW - timedelta(hours=ROLLUP_HOURS)}},
+            [("bucket", 1)],
+            0,
+            ROLLUP_HOURS,
+        ),
+    ]
+
+
+def test_hot_query_plans(seeded_db):
+    db, seeded = seeded_db
+    failures = []
+    for name, collection, query, sort, limit, budget in hot_queries(seeded):
+        result = explain(db, collection, query, sort, limit)
+        plan_stages = stages(result["queryPlanner"]["winningPlan"])
+        examined = result["executionStats"]["totalDocsExamined"]
+        if "COLLSCAN" in plan_stages:
+            failures.append(f"{name}: COLLSCAN")
+        if "SORT" in plan_stages:
+            failures.append(f"{name}: blocking SORT")
+        if examined > budget:
+            failures.append(f"{name}: {examined} docs examined, budget {budget}")
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,82 @@
+"""HostRateLimiter token buckets and pauses, and parsing of host_rate_limits and Retry-After."""
+
+# ruff: noqa: SLF001 - the tests read the parsed limit of a host through the private lookup
+
+from datetime import timedelta
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+rate_limit = pytest.importorskip("app.core.rate_limit")
+
+from mm_std import utc  # noqa: E402
+
+
+def make_core(host_rate_limits: str = "") -> SimpleNamespace:
+    """Stand-in for AppCore with just what HostRateLimiter reads."""
+    return SimpleNamespace(settings=SimpleNamespace(host_rate_limits=host_rate_limits))
+
+
+def test_host_limit_matches_subdomains_and_falls_back_to_default():
+    limiter = rate_limit.HostRateLimiter(make_core("example.com 5, rpc.example.com 10 20, * 1"))
+    assert limiter._limit("rpc.example.com") == (10, 20)
+    assert limiter._limit("eu.rpc.example.com") == (10, 20)
+    assert limiter._limit("other.example.com") == (5, 5)
+    assert limiter._limit("example.org") == (1, 1)
+
+
+def test_host_limit_without_default_is_unlimited():
+    limiter = rate_limit.HostRateLimiter(make_core("example.com 5"))
+    assert limiter._limit("example.org") is None
+    assert limiter.interval("example.org") == 0
+    assert all(limiter.acquire("example.org") == 0 for _ in range(100))
+
+
+def test_host_limits_are_reparsed_when_the_setting_changes():
+    core = make_core("example.com 1 1")
+    limiter = rate_limit.HostRateLimiter(core)
+    assert limiter.acquire("example.com") == 0
+    assert limiter.acquire("example.com") > 0
+    core.settings.host_rate_limits = "example.com 10 2"
+    assert limiter.acquire("example.com") == 0  # a new bucket, starting full
+    assert limiter.acquire("example.com") == 0
+    assert limiter.acquire("example.com") == pytest.approx(0.1, abs=0.01)
+
+
+def test_paused_host_waits_out_the_pause():
+    limiter = rate_limit.HostRateLimiter(make_core())
+    limiter.pause("example.com", 30)
+    assert limiter.acquire("example.com") == pytest.approx(30, abs=0.1)
+    assert limiter.acquire("example.org") == 0
+    limiter.pause("example.com", 0)
+    assert limiter.acquire("example.com") == 0
+
+
+def test_parse_host_limits_skips_invalid_entries():
+    text = "a.com 5\nb.com 2 10, c.com, d.com x, e.com 0, f.com 1 0.5, g.com 1 2 3, *  3"
+    assert rate_limit.parse_host_limits(text) == {"a.com": (5, 5), "b.com": (2, 10), "*": (3, 3)}
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, None),
+        ("", None),
+        ("12", 12),
+        ("1.5", 1.5),
+        ("-3", 0),
+        ("99999", rate_limit.MAX_RETRY_AFTER),
+        ("soon", None),
+    ],
+)
+def test_parse_retry_after_seconds(value, expected):
+    assert rate_limit.parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    in_a_minute = utc() + timedelta(seconds=60)
+    assert rate_limit.parse_retry_after(format_datetime(in_a_minute, usegmt=True)) == pytest.approx(60, abs=2)
+    naive = format_datetime(in_a_minute.replace(tzinfo=None))  # "-0000", a UTC time
+    assert rate_limit.parse_retry_after(naive) == pytest.approx(60, abs=2)
+    assert rate_limit.parse_retry_after(format_datetime(utc() - timedelta(hours=1), usegmt=True)) == 0
@@ -0,0 +1,96 @@
+"""Classification of RPC height responses and the response size limit of HttpPool."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+http_pool = pytest.importorskip("app.core.http_pool")
+rpc = pytest.importorskip("app.core.rpc")
+
+HttpResponse = http_pool.HttpResponse
+
+
+def extract(body: bytes, field: str = "result", convert=rpc._hex_int):  # noqa: SLF001 - the shared parser of all networks
+    return rpc._extract_height(HttpResponse(status_code=200, body=body, label="evm"), field, convert)  # noqa: SLF001
+
+
+def test_height_is_read_from_the_field():
+    assert extract(b'{"jsonrpc": "2.0", "id": "1", "result": "0x10"}').unwrap() == 16
+    assert extract(b'  {"block_height": "123"}', field="block_height", convert=int).unwrap() == 123
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"<html><body>502 Bad Gateway</body></html>",
+        b"",
+        b'[{"result": "0x10"}]',
+        b'"0x10"',
+        b"16",
+        b'{"result": "0x10"',
+        b'{"jsonrpc": "2.0", "id": "1"}',
+        b'{"result": null}',
+        b'{"result": "latest"}',
+    ],
+    ids=["html", "empty", "array", "string", "number", "truncated", "missing field", "null field", "not a number"],
+)
+def test_bodies_without_a_height_are_unknown_responses(body):
+    res = extract(body)
+    assert res.unwrap_err() == "unknown_response"
+    assert res.extra["error_message"]
+    assert res.extra["status_code"] == 200
+
+
+@pytest.mark.parametrize("code", [429, -32005])
+def test_throttling_error_codes_are_rate_limited(code):
+    res = extract(b'{"jsonrpc": "2.0", "id": "1", "error": {"code": %d, "message": "slow down"}}' % code)
+    assert res.unwrap_err() == "rate_limited"
+
+
+def test_other_rpc_errors_are_service_errors():
+    res = extract(b'{"jsonrpc": "2.0", "id": "1", "error": {"code": -32601, "message": "method not found"}}')
+    assert res.unwrap_err() == "service_error: method not found"
+    assert extract(b'{"error": "forbidden"}').unwrap_err() == "service_error: forbidden"
+
+
+def test_stored_body_is_cut():
+    body = b'{"padding": "' + b"x" * http_pool.STORED_BODY_SIZE + b'"}'
+    assert len(extract(body).extra["body"]) == http_pool.STORED_BODY_SIZE
+
+
+class FakeResponse:
+    """The parts of aiohttp.ClientResponse that _read_limited reads."""
+
+    def __init__(self, body: bytes, content_length: int | None) -> None:
+        self.content_length = content_length
+        self.chunks = [body[i : i + http_pool.READ_CHUNK] for i in range(0, len(body), http_pool.READ_CHUNK)]
+        self.reads = 0
+        self.content = SimpleNamespace(read=self.read)
+
+    async def read(self, size: int) -> bytes:
+        assert size == http_pool.READ_CHUNK
+        self.reads += 1
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def read_limited(res: FakeResponse, max_size: int) -> bytes | None:
+    return asyncio.run(http_pool._read_limited(res, max_size))  # noqa: SLF001
+
+
+def test_body_within_the_limit_is_read():
+    body = b"x" * (http_pool.READ_CHUNK * 2 + 1)
+    assert read_limited(FakeResponse(body, len(body)), len(body)) == body
+    assert read_limited(FakeResponse(body, None), len(body)) == body
+
+
+def test_oversize_body_is_not_read_when_its_length_is_known():
+    res = FakeResponse(b"x" * 100, 100)
+    assert read_limited(res, 99) is None
+    assert res.reads == 0
+
+
+def test_oversize_body_without_a_length_is_aborted_past_the_limit():
+    res = FakeResponse(b"x" * (http_pool.READ_CHUNK * 10), None)
+    assert read_limited(res, http_pool.READ_CHUNK * 2) is None
+    assert res.reads == 3